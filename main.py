@@ -27,44 +27,128 @@ SAT-Solvers operates on CNFs (Conjunctive Normal Forms), which is a structure th
 A clause is a set of literals (which are either variables or negated variables), and a clause is true if at least one of the literal it contains is true.
 An example CNF would be {{-1, -2}, {1, -2}, {1, 2}}, in this case it consists of three clauses. The first clause that is true if either variable is false (the "-" denotes the negation), the 2nd clause is true if the first variable is true or the second variable is false, and the  third clause is true if either variable is true. For this CNF and the two given variables, there is 1 solution variable assignment: {1, -2} (the solution assigns variable 1 to true and variable 2 to false).
 A valid Sudoku puzzle has exactly one such solution assignment. The assignment can be uniquely determined by a CNF that encodes the usual Sudoku restrictions (numbers 1-9 appearing exactly once in each row, column and 3x3-subgrid, exactly one number appearing in each square, together with some squares that are already filled with numbers).
+By default, however, the Sudoku is solved by a Sudoku-specific solver (see 'sudoku_solver.py'), which does the same kind of propagation directly on bitmasks of the numbers still possible in each square, row, column and 3x3-subgrid, and is considerably faster. The SAT-Solver can still be used by passing 'use_sat_solver=True' to 'solve_puzzle'.
 
 """
 
 import numpy as np
 
-from modules.solver import Solver
-from modules.generate_sudoku_cnf import get_complete_sudoku_clauses, split_global_identifier
-from modules.visualisation import draw_sudoku, draw_attempt
+from modules.solver import Solver, SolverPySAT
+from modules.sudoku_solver import SudokuSolver
+from modules.generate_sudoku_cnf import get_complete_sudoku_clauses
+from modules.visualisation import draw_sudoku, draw_attempt, render_attempt
 
-def solve_puzzle(puzzle: np.array):
+def _validate_puzzle(puzzle: np.array, name: str='puzzle'):
 	"""
-	Solves the Sudoku puzzle passed as parameter.
+	Checks that the given array is a 9x9 Sudoku filled with the numbers from 0 to 9.
+	
+	This is done once when entering 'solve_puzzle'/'solve_and_compare', the functions called afterwards rely on it and do not repeat the checks.
+	
+	puzzle: the array to be checked
+	name: the name of the array, used in the assertion messages
+	"""
+	assert puzzle.shape == (9, 9), f"'{name}' array has wrong shape, should be (9, 9) but is: {puzzle.shape}"
+	# a single elementwise pass instead of separate 'np.min' and 'np.max' reductions
+	assert ((puzzle >= 0) & (puzzle <= 9)).all(), f"'{name}' array entries out of bounds [0, 9]: {puzzle}"
+
+
+def _solve_with_sat_solver(puzzle: np.array):
+	"""
+	Converts the Sudoku puzzle into a CNF, solves it with a SAT-Solver and converts the solution back into a 9x9 array.
+	
+	If PySAT is installed, its Glucose4 solver is used (see 'SolverPySAT'), otherwise the (much slower) pure Python solver from 'solver.py'.
 	"""
-	# asserts are in 'get_complete_sudoku_clauses'
 	clauses = get_complete_sudoku_clauses(puzzle)
-	solver = Solver(clauses, 9 ** 3)
+	solver = SolverPySAT(clauses, 9 ** 3) if SolverPySAT.is_available else Solver(clauses, 9 ** 3)
 	solved = solver.solve()
 	assert solved
 	solution_vars = solver.get_solution()
+	
+	# decode all 81 global identifiers at once, this is the same computation as in 'split_global_identifier'
+	identifiers = np.asarray(solution_vars, dtype=np.int64) - 1
+	assert len(identifiers) == 9 ** 2 # exactly one number per square
+	ns = identifiers % 9 + 1
+	xs = (identifiers // 9) % 9
+	ys = identifiers // 9 ** 2
+	
 	solution_arr = np.empty((9,9), dtype=int)
-	for var in solution_vars:
-		x, y, i = split_global_identifier(var)
-		solution_arr[y, x] = i
-		if puzzle[y, x] > 0:
-			assert puzzle[y, x] == i # assert the solution does not clash with the original puzzle
+	solution_arr[ys, xs] = ns
+	
+	return solution_arr
+
+
+def solve_puzzle(puzzle: np.array, use_sat_solver: bool=False):
+	"""
+	Solves the Sudoku puzzle passed as parameter.
+	
+	By default, the Sudoku-specific constraint propagation solver from 'sudoku_solver.py' is used, which works on the Sudoku grid directly and is the fastest option.
+	If 'use_sat_solver' is set, the puzzle is converted into a CNF and solved by a SAT-Solver instead (see '_solve_with_sat_solver').
+	Either way, there is an assertion error if the puzzle does not have exactly one solution.
+	"""
+	_validate_puzzle(puzzle)
+	
+	if use_sat_solver:
+		solution_arr = _solve_with_sat_solver(puzzle)
+	else:
+		solver = SudokuSolver(puzzle)
+		solved = solver.solve()
+		assert solved
+		solution_arr = solver.get_solution()
+	
+	# assert the solution does not clash with the original puzzle
+	givens_mask = puzzle > 0
+	assert np.array_equal(puzzle[givens_mask], solution_arr[givens_mask])
 	
 	return solution_arr
 
 
+def solve_and_render(puzzle: np.array, attempted: np.array, format: str='svg'):
+	"""
+	Solves the Sudoku puzzle and renders the (possibly partially) filled out Sudoku 'attempted' like 'draw_attempt', with the correct/incorrect entries being colored green and red respectively.
+	
+	Returns the image as bytes in the given format (see 'render_attempt'), or None if the puzzle does not have exactly one solution.
+	This is what the web app ('web_input.py') runs in its worker processes, it is defined in this module as the workers can import it without any side effects.
+	"""
+	try:
+		# try solving the Sudoku puzzle presented by the 'givens'
+		solution_arr = solve_puzzle(puzzle)
+	except AssertionError:
+		# assertion error if there isn't exactly one solution
+		return None
+	
+	return render_attempt(puzzle, attempted, solution_arr, format=format).getvalue()
+
+
+def is_valid_solution(grid: np.array):
+	"""
+	Checks whether the given 9x9 array is a completely and correctly filled out Sudoku, i.e. whether every row, column and 3x3 subgrid contains each number from 1 to 9 exactly once.
+	
+	This only takes a few NumPy operations, which is a lot cheaper than solving the Sudoku.
+	"""
+	subgrids = grid.reshape(3, 3, 3, 3).transpose(0, 2, 1, 3).reshape(9, 9) # each row of 'subgrids' holds the numbers of one 3x3 subgrid
+	numbers = np.arange(1, 10)
+	
+	# after sorting, every row (and thus also every column and subgrid) has to be exactly the numbers from 1 to 9
+	return all((np.sort(groups, axis=1) == numbers).all() for groups in (grid, grid.T, subgrids))
+
+
 def solve_and_compare(puzzle: np.array, filled: np.array=None):
 	"""
 	Solves the Sudoku puzzle and optionally compares it to a (possibly partially) filled out Sudoku.
 	If such a filled out Sudoku was passed as an argument, the differences in solutions is shown (empty fields ommitted).
 	If no such filled out Sudoku was passed as an argument, the whole solution to the puzzle is shown.
+	
+	If the filled out Sudoku is complete, valid and contains all givens of the puzzle, then it is a correct solution and it is shown without solving the puzzle first.
 	"""
-	# only check 'filled' as 'puzzle' is checked in a sub-call of 'solve_puzzle'
-	assert filled is None or filled.shape == (9, 9), f"'filled' array has wrong shape in 'solve_and_compare' call, should be (9, 9) but is: {filled.shape}"
-	assert filled is None or (0 <= np.min(filled) and np.max(filled) <= 9), f"'filled' array entries out of bounds (>= 9 or <= 0) in 'array_to_clauses' call: {filled}"
+	if filled is not None:
+		_validate_puzzle(puzzle)
+		_validate_puzzle(filled, 'filled')
+		
+		givens_mask = puzzle > 0
+		if is_valid_solution(filled) and np.array_equal(puzzle[givens_mask], filled[givens_mask]):
+			# all squares are filled in correctly, so the filled out Sudoku itself serves as the solution
+			draw_attempt(puzzle, filled, filled)
+			return
 	
 	solution_arr = solve_puzzle(puzzle)
 			
@@ -4,14 +4,44 @@
 This module contains the code necessary to generate the Clause Normal Form (CNF) for Sudokus, in a format that is understood by the SAT-Solver in the 'Solver' module.
 
 There are two parts of a Sudoku puzzle that need to be converted into a CNF:
-	(1) The general rules of the Sudoku (these are always the same and could theoretically be precomputed once and reused).
+	(1) The general rules of the Sudoku (these are always the same, thus they are precomputed once when the module is imported and then reused).
 	(2) The numbers that are already given in the Sudoku.
 
-The 1st part is done in the 'generate_sudoku_base' function, while the 2nd part is done in 'array_to_clauses'. 'get_complete_sudoku_clauses' calls both of these functions and combines the result into one single CNF. The representation chosen for the CNF is a hashset (i.e. set of clauses) of frozensets (the literals in each clause are the elements of the frozenset that corresponds to the clause).
+The 1st part is done in the 'generate_sudoku_base' function (or, equivalently but vectorized with NumPy, in 'generate_sudoku_base_array'), while the 2nd part is done in 'array_to_clauses'. 'get_complete_sudoku_clauses' combines the (cached) result of the former with the result of the latter into one single CNF. The representation chosen for the CNF is a hashset (i.e. set of clauses) of tuples (the literals in each clause are the elements of the tuple that corresponds to the clause). The literals in each tuple are sorted by their absolute value (see '_clause'), so that clauses containing the same literals are also equal as tuples and duplicates are discarded by the hashset.
 """
 
+import os
+import sys
+import tempfile
 import numpy as np
 from collections.abc import Iterable
+from itertools import combinations
+from pathlib import Path
+
+# the string representations of all literals that can appear in a Sudoku CNF, used by 'print_clauses' to avoid converting the same literals to strings over and over
+_LITERAL_STRINGS = {literal: str(literal) for literal in range(-9 ** 3, 9 ** 3 + 1)}
+
+# the (x,y) coordinates of the squares of each column, row and 3x3 subgrid, these never change and are therefore not rebuilt for every call of 'generate_sudoku_base'
+_COLUMNS = tuple(tuple((n, i) for i in range(9)) for n in range(9))
+_ROWS = tuple(tuple((i, n) for i in range(9)) for n in range(9))
+_SUBGRIDS = tuple(tuple((x + x_offset, y + y_offset) for x in range(3) for y in range(3)) for x_offset in range(0, 9, 3) for y_offset in range(0, 9, 3))
+
+# the pairs (n1, n2) of numbers with n1 < n2, i.e. the pairs of variables within a square that cannot both be true (see 'generate_at_most_one')
+# as the literals of clauses are sorted, {-i1, -i2} is the same as {-i2, -i1}, thus it is fine that 'combinations' yields each pair only once
+_AMO_PAIRS = tuple(combinations(range(1, 10), 2))
+
+# the global identifiers of all 729 variables, _ID_LUT[y, x, n - 1] is the same as 'get_global_identifier(x, y, n)', so that the identifiers of many squares can be looked up at once
+# as the identifiers are y * 9 ** 2 + x * 9 + n, they are simply the numbers from 1 to 729 in this order
+_ID_LUT = np.arange(1, 9 ** 3 + 1, dtype=np.int16).reshape(9, 9, 9)
+
+def _clause(literals: Iterable):
+	"""
+	Converts a collection of literals into the clause representation used in this module: a tuple of the literals, sorted by their absolute value.
+	
+	Compared to a frozenset, a tuple needs less memory and is cheaper to hash, while the sorting still makes the representation of a clause unique.
+	"""
+	return tuple(sorted(literals, key=abs))
+
 
 def get_global_identifier(x: int, y: int, n: int):
 	"""
@@ -66,7 +96,7 @@ def split_global_identifier(identifier: int):
 
 def generate_at_most_one(x: int,y: int):
 	"""
-	Generates a set of clauses that encode that only a single number may appear in the square at (x,y).
+	Generates a list of clauses that encode that only a single number may appear in the square at (x,y).
 	
 	x,y: the coordinates of the square
 	
@@ -75,95 +105,168 @@ def generate_at_most_one(x: int,y: int):
 	"""
 	assert 0 <= x <= 8 and 0 <= y <= 8, f"x or y out of range [0,8] in 'generate_at_most_one' call: x={x}, y={y}"
 	
-	# the returned set
-	clauses = set()
+	# the global identifiers of the square's variables are offset + n, computed with the same formula as in 'get_global_identifier'
+	offset = y * 9 ** 2 + x * 9
 	
-	# these two loops could be optimized in several ways, but are left as-is for the sake of readability
-	# e.g. the first range could instead be 'range(1, 9)', as i1=9 will make the second range empty
-	for i1 in range(1, 10):
-		# as clauses are sets, {-i1, -i2} is the same as {-i2, -i1}, thus it is fine if we only consider the cases where i2 > i1
-		for i2 in range(i1 + 1, 10):
-			clauses.add(frozenset((-get_global_identifier(x, y, i1), -get_global_identifier(x, y, i2))))
+	# the pairs are the same for every square apart from the offset, so they are taken from '_AMO_PAIRS'
+	# as n1 < n2, the literals of each clause are already sorted by their absolute value (see '_clause')
+	clauses = [(-(offset + n1), -(offset + n2)) for n1, n2 in _AMO_PAIRS]
 	
 	assert len(clauses) == 9 * 8 // 2 # basic sanity check - there are 9 * 8 pairs (i1, i2), if we disregard the order then that number is halfed
 	
 	return clauses
 
 
-def generate_at_least_one(grouped_squares: Iterable):
+def generate_at_least_one(grouped_squares: Iterable, skip_aligned_pairs: bool=False, redundant: bool=True):
 	"""
-	Generates a set of clauses that encode that each number from 1 to 9 has to appear exactly once in the given 9 coordinates.
+	Generates a list of clauses that encode that each number from 1 to 9 has to appear exactly once in the given 9 coordinates.
 	
 	This is used to encode the condition that each number appears exactly once in each row/column/3x3 subgrid.
 	
 	grouped_squares: a collection of exactly 9 (x,y) pairs - either a row, a column or a 3x3 subgrid
+	skip_aligned_pairs: if True, the redundant pair clauses (see below) are not generated for two squares in the same row or column, as the row/column already produces them. This is used for the 3x3 subgrids, so that every clause is generated only once.
+	redundant: if False, the redundant pair clauses are not generated at all, only the at-least-one clauses
 	"""
 	
 	# sanity checks
-	assert len(grouped_squares) == 9, f"grouped_squares contains invalid number of coordinates in 'generate_exactly_once' call: {len(coordinates)}"
+	assert len(grouped_squares) == 9, f"grouped_squares contains invalid number of coordinates in 'generate_exactly_once' call: {len(grouped_squares)}"
 	assert len(set(grouped_squares)) == 9, f"grouped_squares contains duplicate coordinates in 'generate_exactly_once' call"
 	
 	for x,y in grouped_squares:
 		assert 0 <= x <= 8, f"x coordinate out of range [0,8] in 'generate_exactly_once' call: {x}"
 		assert 0 <= y <= 8, f"y coordinate out of range [0,8] in 'generate_exactly_once' call: {y}"
 	
-	# the set of clauses that the function will return
-	clauses = set()
+	# the pairs of positions within 'grouped_squares' for which the redundant pair clauses are generated
+	pairs = [(j, k) for j, k in combinations(range(9), 2)
+		if redundant and not (skip_aligned_pairs and (grouped_squares[j][0] == grouped_squares[k][0] or grouped_squares[j][1] == grouped_squares[k][1]))]
+	
+	# the list of clauses that the function will return, every clause is generated exactly once so no set is needed to discard duplicates
+	clauses = []
 	
-	for i in range(1, 10):
+	# identifiers_by_number[i - 1] holds the global identifiers of variable i in the grouped squares, looked up in '_ID_LUT' for all numbers at once
+	xs, ys = zip(*grouped_squares)
+	identifiers_by_number = _ID_LUT[ys, xs].T.tolist()
+	
+	for i, identifiers in enumerate(identifiers_by_number, start=1):
 		# i_clause is a clause that encodes that variable i must appear at least once among the coordinates
-		i_clause = frozenset({get_global_identifier(x,y,i) for (x,y) in grouped_squares})
+		i_clause = _clause(identifiers)
 		assert len(i_clause) == 9 # very basic sanity check
-		clauses.add(i_clause)
+		clauses.append(i_clause)
 		
 		# additional clauses that encode that if one square among the 'grouped_squares' contains a number (variable), then no other square among the group may contain the same number
 		# this information is redundant due to the fact that only one variable may contain a square and all 9 numbers must appear in the 9 squares, but it can speed up the SAT-solver
-		for j in range(9):
-			x1, y1 = grouped_squares[j]
-			for k in range(j + 1, 9):
-				x2, y2 = grouped_squares[k]
-				# this clause says that if number i is filled into square (x1, y1) then it cannot also be filled into (x2, y2)
-				nand_clause = frozenset((-get_global_identifier(x1, y1, i), -get_global_identifier(x2, y2, i)))
-				clauses.add(nand_clause)
+		for j, k in pairs:
+			# this clause says that if number i is filled into the jth square then it cannot also be filled into the kth square
+			clauses.append(_clause((-identifiers[j], -identifiers[k])))
 	
-	assert len(clauses) == 9 + 9 * 9 * 8 // 2 # another very basic sanity check
+	assert len(clauses) == 9 + 9 * len(pairs) # another very basic sanity check
 	
 	return clauses
 	
-def generate_sudoku_base():
+def generate_sudoku_base(redundant: bool=True):
 	"""
 	Generates clauses that encode the basic conditions for the whole 9x9 Sudoku grid. This is equivalent to a Sudoku grid with 0 given numbers (i.e. not a valid Sudoku puzzle).
 	
 	There is some redundant information in the clauses created here, which is advantageous to the SAT-solver as it has more information to work with.
-	Identical clauses (which do not provide extra information) are silently discarded due to the fact that a set is used.
+	Identical clauses (which do not provide extra information) are not generated in the first place: a pair clause for two squares that share a row or column as well as a 3x3 subgrid is only generated for the row or column.
+	As the clauses generated for the different groups and squares are thus disjoint, they are simply concatenated into a list instead of being deduplicated by hashing them into a set.
+	
+	redundant: if False, the redundant pair clauses of the rows/columns/subgrids are left out, which shrinks the CNF to about a third of its size but makes solving much slower (the solvers need them to propagate what is otherwise only found by splitting), so they are generated by default.
 	"""
 	
-	base_clauses = set()
+	base_clauses = []
 	
 	# generate the at-least-one clauses for the rows and columns
-	for n in range(9):
-		# generate the clauses for the nth column
-		nth_column_clauses = generate_at_least_one([(n, i) for i in range(9)])
-		base_clauses.update(nth_column_clauses) # in-place union of sets
-		
-		# generate the clauses for the n+1th row
-		nth_row_clauses = generate_at_least_one([(i, n) for i in range(9)])
-		base_clauses.update(nth_row_clauses) # in-place union of sets
+	for column, row in zip(_COLUMNS, _ROWS):
+		base_clauses.extend(generate_at_least_one(column, redundant=redundant))
+		base_clauses.extend(generate_at_least_one(row, redundant=redundant))
 	
 	# generate the at-least-one clauses for the 3x3 subgrids
-	for x_offset in range(0, 9, 3): # first subgrid starts at x=0, second at x=3, third at x=6
-		for y_offset in range(0, 9, 3): # see above, also holds for y
-			subgrid_clauses = generate_at_least_one([(x + x_offset, y + y_offset) for x in range(3) for y in range(3)])
-			base_clauses.update(subgrid_clauses)
+	for subgrid in _SUBGRIDS:
+		base_clauses.extend(generate_at_least_one(subgrid, skip_aligned_pairs=True, redundant=redundant))
 	
 	# generate the at-most-one clauses for each square
 	for x in range(9):
 		for y in range(9):
 			at_most_one_clauses = generate_at_most_one(x,y) # clauses encoding that at most one number may be in square (x,y)
-			base_clauses.update(at_most_one_clauses)
+			base_clauses.extend(at_most_one_clauses)
 	
 	return base_clauses
 
+
+def generate_sudoku_base_array(redundant: bool=True):
+	"""
+	Generates the same clauses as 'generate_sudoku_base', but with NumPy array operations instead of Python loops and in a flat array representation.
+	
+	redundant: whether to generate the redundant pair clauses of the rows/columns/subgrids, see 'generate_sudoku_base'
+	
+	Returns a tuple (clause_array, lengths):
+	clause_array: an int32 array of shape (number of clauses, 9), each row holds the literals of one clause sorted by their absolute value and padded with zeroes (which are never a valid literal, see DIMACS CNF)
+	lengths: an uint8 array holding the number of literals of each clause, i.e. the number of non-padding entries in the corresponding row of 'clause_array'
+	"""
+	# cells[y, x] is the index of the square at (x,y), so that the global identifier of number n in that square is cells[y, x] * 9 + n (see 'get_global_identifier')
+	cells = np.arange(9 ** 2).reshape(9, 9)
+	numbers = np.arange(1, 10)
+	
+	# the 27 groups of 9 squares each: columns, rows and 3x3 subgrids
+	columns = cells.T
+	rows = cells
+	subgrids = cells.reshape(3, 3, 3, 3).transpose(0, 2, 1, 3).reshape(9, 9)
+	groups = np.concatenate((columns, rows, subgrids))
+	
+	# the index pairs (j, k) with j < k among 9 elements, this is the same enumeration as 'combinations(range(9), 2)'
+	first, second = np.triu_indices(9, k=1)
+	# the index pairs within a 3x3 subgrid whose squares share neither a row nor a column (see 'skip_aligned_pairs' in 'generate_at_least_one')
+	unaligned = (first // 3 != second // 3) & (first % 3 != second % 3)
+	
+	# group_identifiers[g, i, k] is the global identifier of number i + 1 in the kth square of group g
+	group_identifiers = groups[:, np.newaxis, :] * 9 + numbers[np.newaxis, :, np.newaxis]
+	# the at-least-one clauses, one for each group and number (see 'generate_at_least_one')
+	at_least_one = np.sort(group_identifiers.reshape(-1, 9), axis=1)
+	# the redundant pair clauses for each group and number (see 'generate_at_least_one')
+	line_identifiers = group_identifiers[:18]
+	subgrid_identifiers = group_identifiers[18:]
+	line_pairs = np.stack((line_identifiers[..., first], line_identifiers[..., second]), axis=-1).reshape(-1, 2)
+	subgrid_pairs = np.stack((subgrid_identifiers[..., first[unaligned]], subgrid_identifiers[..., second[unaligned]]), axis=-1).reshape(-1, 2)
+	if not redundant:
+		line_pairs = line_pairs[:0]
+		subgrid_pairs = subgrid_pairs[:0]
+	
+	# square_identifiers[c, i] is the global identifier of number i + 1 in square c
+	square_identifiers = cells.reshape(-1, 1) * 9 + numbers
+	# the at-most-one clauses for each square (see 'generate_at_most_one')
+	square_pairs = np.stack((square_identifiers[:, first], square_identifiers[:, second]), axis=-1).reshape(-1, 2)
+	
+	# all pair clauses consist of negated literals, sorting the identifiers before negating them sorts the literals by their absolute value
+	# as the pairs of the subgrids are restricted to the unaligned ones, no pair clause is generated twice and no deduplication is necessary
+	pairs = -np.sort(np.concatenate((line_pairs, subgrid_pairs, square_pairs)), axis=1)
+	
+	clause_array = np.zeros((len(at_least_one) + len(pairs), 9), dtype=np.int32)
+	clause_array[:len(at_least_one)] = at_least_one
+	clause_array[len(at_least_one):, :2] = pairs
+	
+	lengths = np.full(len(clause_array), 2, dtype=np.uint8)
+	lengths[:len(at_least_one)] = 9
+	
+	return clause_array, lengths
+
+
+def clause_array_to_clauses(clause_array: np.array, lengths: np.array):
+	"""
+	Converts clauses in the flat array representation of 'generate_sudoku_base_array' into the set of tuples representation used in the rest of this module.
+	
+	clause_array: an array of clauses, one per row, padded with zeroes
+	lengths: the number of literals of each clause
+	"""
+	clauses = set()
+	
+	# the clauses are converted in bulk, one batch for each clause length, which avoids slicing every single row in Python
+	for length in np.unique(lengths):
+		clauses.update(map(tuple, clause_array[lengths == length, :length].tolist()))
+	
+	return clauses
+
+
 def print_clauses(clauses: Iterable):
 	"""
 	Prints the given clauses in the DIMACS CNF format.
@@ -178,21 +281,21 @@ def print_clauses(clauses: Iterable):
 	1 -2 0
 	1 2 0
 	"""
-	print(f"p cnf {9 ** 3} {len(clauses)}")
-	
 	clause_list = list()
 	
 	# sort the literals in the clauses to get a more readable output
 	for clause in clauses:
-		# the key function applied here is not very nice but suitable due to the clause size limits
-		clause_list.append(tuple(sorted(clause, key=lambda x:abs(x))))
+		# clauses generated in this module are already sorted, but other collections of literals are accepted as well
+		clause_list.append(_clause(clause))
 	
 	# sort the clauses themselves to get a more readable output
 	# as above, computationally there is some redundancy here that could be improved but for just ~3200 clauses it does not matter
-	clause_list.sort(key=lambda x: (len(x),) + tuple(abs(i) for i in x))
+	clause_list.sort(key=lambda x: (len(x),) + tuple(map(abs, x)))
 	
-	for clause in clause_list:
-		print(" ".join([str(lit) for lit in clause]) + " 0")
+	# the whole output is assembled first and then written at once, instead of printing every clause separately
+	lines = [f"p cnf {9 ** 3} {len(clauses)}"]
+	lines.extend(" ".join([_LITERAL_STRINGS[lit] for lit in clause]) + " 0" for clause in clause_list)
+	sys.stdout.write("\n".join(lines) + "\n")
 
 
 def array_to_clauses(puzzle: np.array):
@@ -200,34 +303,89 @@ def array_to_clauses(puzzle: np.array):
 	Converts a (partially) filled out Sudoku in array form into (unit) clauses.
 	
 	puzzle: a 9x9 array filled with the numbers from 0 to 9. Zeroes denote unfilled squares.
-	"""
 	
-	assert puzzle.shape == (9, 9), f"input array has wrong shape in 'array_to_clauses' call, should be (9, 9) but is: {array.shape}"
-	assert 0 <= np.min(puzzle) and np.max(puzzle) <= 9, f"input array entries out of bounds (>= 9 or <= 0) in 'array_to_clauses' call: {repr(array)}"
+	The array is not checked here, this is done once by the caller (see '_validate_puzzle' in main.py).
+	"""
 	
-	# the unit clauses
-	clauses = set()
+	# the coordinates of all filled squares
+	ys, xs = np.nonzero(puzzle)
 	
-	for x in range(9):
-		for y in range(9):
-			i = puzzle[y, x]
-			if i > 0:
-				clauses.add(frozenset((get_global_identifier(x, y, i),)))
+	# the global identifiers of all givens at once, looked up in '_ID_LUT'
+	identifiers = _ID_LUT[ys, xs, puzzle[ys, xs] - 1]
 	
-	return clauses
+	# the unit clauses
+	return {(identifier,) for identifier in identifiers.tolist()}
 
 
 def get_complete_sudoku_clauses(puzzle: np.array):
 	"""
 	Converts a 9x9 Sudoku with some givens into a CNF and returns that formula.
 	
-	puzzle: a 9x9 array filled with the numbers from 0 to 9. Zeroes denote unfilled squares.
-	"""
-	assert puzzle.shape == (9, 9), f"input array has wrong shape in 'array_to_clauses' call, should be (9, 9) but is: {array.shape}"
-	assert 0 <= np.min(puzzle) and np.max(puzzle) <= 9, f"input array entries out of bounds (>= 9 or <= 0) in 'array_to_clauses' call: {repr(array)}"
+	puzzle: a 9x9 array filled with the numbers from 0 to 9. Zeroes denote unfilled squares. It is expected to be checked by the caller already.
 	
+	The general Sudoku rules are taken from '_BASE_CLAUSES' instead of being regenerated for every puzzle, only the unit clauses of the givens are created here.
+	"""
 	clauses = array_to_clauses(puzzle)
-	clauses.update(generate_sudoku_base())
+	clauses.update(_BASE_CLAUSES)
 	
 	return clauses
 
+
+# the number of base clauses: 81 * 36 at-most-one clauses for the squares, 27 * 9 at-least-one clauses for the groups and 9 * (18 * 36 + 9 * 18) redundant pair clauses for the groups
+_BASE_CLAUSE_COUNT = 81 * 36 + 27 * 9 + 9 * (18 * 36 + 9 * 18)
+
+# the version of the cache file, part of its name - it has to be increased whenever 'generate_sudoku_base_array' changes the clauses it generates, so that an outdated cache file is not used
+_BASE_CACHE_VERSION = 1
+
+
+def _load_base_clause_array(cache_path: Path=None):
+	"""
+	Returns the base clauses in the flat array representation of 'generate_sudoku_base_array'.
+	
+	As the base clauses never change, the clause array is saved to a cache file next to this module the first time it is generated, and every later run (i.e. every new Python process) just loads it from there.
+	If the cache file cannot be read or written (e.g. in a read-only installation) or is broken, the clauses are simply generated.
+	
+	cache_path: Optional, the path of the cache file, by default 'base_cnf_v<version>.npy' in the directory of this module.
+	"""
+	if cache_path is None:
+		cache_path = Path(__file__).with_name(f"base_cnf_v{_BASE_CACHE_VERSION}.npy")
+	
+	try:
+		clause_array = np.load(cache_path)
+	except Exception: # missing, unreadable, empty or truncated cache file
+		clause_array = None
+	
+	# basic check against broken or outdated cache files
+	if clause_array is None or clause_array.dtype != np.int32 or clause_array.shape != (_BASE_CLAUSE_COUNT, 9):
+		clause_array, _ = generate_sudoku_base_array()
+		_save_base_clause_array(cache_path, clause_array)
+	
+	# the lengths are not stored in the cache file, as the padding zeroes already determine them
+	lengths = np.count_nonzero(clause_array, axis=1).astype(np.uint8)
+	
+	return clause_array, lengths
+
+
+def _save_base_clause_array(cache_path: Path, clause_array: np.array):
+	"""
+	Saves the base clause array to the cache file, see '_load_base_clause_array'.
+	
+	The array is first written to a temporary file which then replaces the cache file, so that other processes never see a partially written cache file.
+	Errors are ignored, the cache file is then simply not (re)written.
+	"""
+	tmp_path = None
+	try:
+		with tempfile.NamedTemporaryFile(dir=cache_path.parent, prefix=cache_path.stem, suffix=".tmp", delete=False) as tmp_file:
+			tmp_path = tmp_file.name
+			np.save(tmp_file, clause_array)
+		os.replace(tmp_path, cache_path)
+	except OSError:
+		if tmp_path is not None:
+			try:
+				os.remove(tmp_path)
+			except OSError:
+				pass
+
+
+# the clauses encoding the general Sudoku rules are the same for every puzzle, thus they are generated only once (see '_load_base_clause_array') and reused for every puzzle
+_BASE_CLAUSES = frozenset(clause_array_to_clauses(*_load_base_clause_array()))
@@ -8,178 +8,385 @@ Given a solution, it also determines whether a Sudoku has more solutions.
 If there is only one solution, outputs the solution (if it exists) in a concise format.
 
 Ideally the solver takes less than 0.1s to do find a solution and check it for uniqueness.
+The search itself only uses plain Python data structures (lists, sets and ints, no NumPy), so that it can also be sped up by running it under PyPy.
+There are no assertions in the propagation and search loops - for debugging, setting the environment variable SOLVER_DEBUG=1 checks the consistency of the solver state before each propagation step.
+The remaining assertions (outside of the loops) can be skipped by running Python with the -O flag.
 """
 
 
+import os
 import numpy as np
 
+from collections import Counter
 from collections.abc import Iterable
+from itertools import compress, product
+from multiprocessing import Pool
 
-from modules.util import magnitude_sign, twos_complement, magnitude as var, is_positive as sign, complement as compl
+from modules.util import magnitude_sign_array, twos_complement, magnitude as var, is_positive as sign
+
+# the optional 'python-sat' package (PySAT) provides bindings to SAT-Solvers written in C/C++, see 'SolverPySAT'
+try:
+	from pysat.solvers import Glucose4
+except ImportError:
+	Glucose4 = None
+
+# whether to check the consistency of the solver state during the search, see 'Solver.check_invariants'
+_DEBUG = os.environ.get('SOLVER_DEBUG') == '1'
+
+
+# the factor by which the activities of the variables decay with each contradiction, as in MiniSat
+_ACTIVITY_DECAY = 0.95
 
 
 class Solver:
 	
-	def __init__(self, clauses: Iterable, n_vars: int, is_main_solver=True):
+	def __init__(self, clauses: Iterable, n_vars: int, pure_literal_elimination: bool=False):
 		"""
 		Constructor for the solver
 		
 		clauses: a collection of clauses, each clause is a collection of variables which are either in the range [1, n_vars] or in the range [-n_vars, -1]
 		n_vars: the number of variables appearing in the clauses
-		is_main_solver: whether this is the main solver or a sub-solver created in a DPLL-split in a variable
+		pure_literal_elimination: whether to apply pure literal elimination before each split (see 'eliminate_pure_literals')
 		"""
-		self.original_clauses = clauses # store the original clauses - we need them later to check for uniqueness of solutions
 		self.n_vars = n_vars # store the n_vars
-		self.clauses = [set() for _ in range(2 * n_vars)] # for each literal, a set of clauses where that literal occurs in (number of literals = 2x number of variables)
-		# two unused extra lists are created so that we don't have to switch from 1-based indexing back to 0-based indexing every time
+		self.pure_literal_elimination = pure_literal_elimination
+		self.clause_lits = [] # the clauses (with at least 2 literals) as lists of literals, the index of a clause in this list is its id - the first two literals of each clause are the ones it is watched by
+		self.watches = [[] for _ in range(2 * n_vars)] # for each literal, the ids of the clauses that are watched by that literal (number of literals = 2x number of variables)
 		self.units = [] # a list of literals found in unit clauses, we use a list as we are interested in the order, also the iteration in which they were found
-		self.var_states = np.zeros((n_vars, 2), dtype=bool) # states for variables that are assigned to a single polarity (i.e. units), used for checking for duplicates or contradictions
-		# var_states[n, 0] = boolean encoding whether variable n has been assigned, var_states[n, 1] = boolean to which value variable n has been assigned (only relevant if the first value is True)
-		
-		# two-pass: first we convert all variables into magnitude-sign, then we construct our own data structures
-		# first pass:
-		temp_clauses = [map(magnitude_sign, clause) for clause in clauses]
-		# second pass:
-		for cl in temp_clauses:
-			clause = frozenset(cl) # we want a frozenset, regardless of what it was before
-			for literal in clause:
-				self.clauses[literal].add(clause)
-				if len(clause) == 1: # if it is an unit clause, add the literal to the units
-					assert sign(literal) # if a negative literal unit clause would end up here, then a mistake when generating the Sudoku puzzle occured - initial units must be positive
-					self.add_unit(literal, 0, 0)
-		
-		self.is_main_solver = is_main_solver
+		# the states of the variables that are assigned to a single polarity (i.e. units), used for checking for duplicates or contradictions
+		# both are bitmasks stored in a Python int, bit n of 'assigned' encodes whether variable n has been assigned, bit n of 'value' to which value variable n has been assigned (always 0 if it is unassigned)
+		self.assigned = 0
+		self.value = 0
+		self.all_vars = (1 << n_vars) - 1 # the bitmask with the bits of all variables set, so that the unassigned variables are 'self.all_vars ^ self.assigned'
+		
+		# a single pass converting the literals into magnitude-sign and constructing our own data structures
+		# the conversion is done with a lookup table instead of calling 'magnitude_sign' for every literal, it is indexed by the literal + n_vars, so that negative literals can be looked up as well
+		ms_table = magnitude_sign_array(np.arange(-n_vars, n_vars + 1)).tolist()
+		ms_table[n_vars] = None # 0 is not a valid literal
+		for cl in clauses:
+			clause = [ms_table[literal + n_vars] for literal in cl]
+			if len(clause) == 1: # if it is an unit clause, add the literal to the units
+				literal, = clause
+				assert sign(literal) # if a negative literal unit clause would end up here, then a mistake when generating the Sudoku puzzle occured - initial units must be positive
+				self.add_unit(literal, 0, 0)
+			else: # otherwise, the clause is watched by its first two literals
+				clause_id = len(self.clause_lits)
+				self.clause_lits.append(clause)
+				self.watches[clause[0]].append(clause_id)
+				self.watches[clause[1]].append(clause_id)
+		
+		self.activity = [0.0] * n_vars # VSIDS-style score for each variable, increased whenever the variable occurs in a clause that lead to a contradiction
+		self.activity_increment = 1.0 # the amount added to the activity, it grows with each contradiction so that recent contradictions count more than older ones
+		
+		self.idx = 0 # the index of the first unit that has not been propagated yet
+		self.decision_levels = [] # for each DPLL-split, the number of units before the split and the literal that was assigned
+		
 		self.is_solved = False # whether the formula has been solved, with exactly one solution
 	
 	def add_unit(self, literal, iteration, guess):
-		assert not self.var_states[var(literal), 0] # variable being assigned twice - this should not happen
+		# the variable must not be assigned yet, which the callers make sure of (see 'check_invariants')
+		# like in the other methods called during the search, the helper functions from 'util.py' are inlined to save the function calls: var(literal) = literal >> 1, sign(literal) = not literal & 1, complement(literal) = literal ^ 1
+		bit = 1 << (literal >> 1)
 		self.units.append((literal, iteration, guess))
-		self.var_states[var(literal), ] = (True, sign(literal))
+		self.assigned |= bit
+		if not literal & 1:
+			self.value |= bit
 	
-	def solve(self, start_idx=0):
+	def propagate(self):
 		"""
-		Function to apply DPLL to the formula and solve it.
+		Function to apply unit propagation to all units that have not been propagated yet.
 		
-		Returns true if the Sudoku has exactly one solution, and false otherwise (no solution/several solutions).
+		Returns false if a contradiction was derived, and true otherwise.
 		
-		start_idx: the index of the first literal that has not been propagated yet (should be left at 0 except for recursive calls)
+		Each clause is watched by two of its literals that are not false (its first two literals), so when a literal becomes false, only the clauses watched by it have to be looked at:
+		if another literal that is not false can be found, it becomes the new watch, otherwise the clause is either satisfied by its other watched literal, a new unit clause, or a contradiction.
+		Clauses are never removed or shrunk, which means that there is nothing to undo when backtracking.
+		The watch lists only hold the ids of the clauses (their index in 'self.clause_lits'), and are updated in place.
 		"""
-		# do unit propagation
-		idx = start_idx
-		while idx < len(self.units):
-			literal, iteration, guess = self.units[idx]
-			
-			# go over all clauses where that literal occurs in that polarity
-			# remove them from the formula, as they are satisfied
-			for rem_clause in self.clauses[literal]:
-				# to remove the clause from the formula, remove it from all literals referencing it
-				for member_literal in rem_clause:
-					if member_literal == literal:
-						continue
-					assert rem_clause in self.clauses[member_literal], f"{member_literal},\n{rem_clause},\n{self.clauses[member_literal]}"
-					self.clauses[member_literal].remove(rem_clause)
-			
-			self.clauses[literal] = frozenset()
+		# the attributes used in the loops are looked up once, the bitmasks are only changed by 'add_unit' and are read again after it is called
+		units = self.units
+		clause_lits = self.clause_lits
+		watches = self.watches
+		assigned = self.assigned
+		value = self.value
+		while self.idx < len(units):
+			if __debug__ and _DEBUG:
+				self.check_invariants()
+			literal, iteration, guess = units[self.idx]
+			self.idx += 1
 			
-			# go over all clauses where the literal occurs in the other polarity
-			# remove the literal in the other polarity from those clauses, as the literal cannot be true in that polarity and thus cannot contribute to satisfying that clause
-			# if this results in new unit clauses, add the units to the respective collections
-			# if this results in the empty clause, the formula is unsatisfiable
-			complement = compl(literal)
-			for mod_clause in self.clauses[complement]:
-				new_clause = set(mod_clause)
-				assert complement in new_clause, f"{complement}, {new_clause}"
-				new_clause.remove(complement)
-				new_clause = frozenset(new_clause)
+			# the complementary literal just became false, go over all clauses watched by it
+			false_literal = literal ^ 1
+			# the ids of the clauses that are still watched by the false literal afterwards are moved to the front of its watch list, which is cut off at the end
+			watchers = watches[false_literal]
+			n_kept = 0
+			for position, clause_id in enumerate(watchers):
+				clause = clause_lits[clause_id]
+				# make sure that the false literal is the second literal of the clause
+				if clause[0] == false_literal:
+					clause[0], clause[1] = clause[1], false_literal
+				other = clause[0]
+				other_var = other >> 1
+				other_assigned = (assigned >> other_var) & 1
+				if other_assigned and (value >> other_var) & 1 != other & 1: # the clause is already satisfied by its other watched literal
+					watchers[n_kept] = clause_id
+					n_kept += 1
+					continue
 				
-				if len(new_clause) == 1: # unit clause produced -> the variable of the remaining literal has to be assigned to that polarity
-					unit_literal, = new_clause # extract the one element
-					if self.var_states[var(unit_literal), 0]: # check whether it is already assigned
-						# if it is assigned to the polarity we just learned about, then everything is fine
-						# otherwise we derived a contradiction
-						if self.var_states[var(unit_literal), 1] != sign(unit_literal):
-							return False
-					else: # if the variable is not assigned to anything yet, add the newly learned unit clause
-						self.add_unit(unit_literal, iteration + 1, guess)
-						
-				elif len(new_clause) == 0: # empty clause produced
-					return False # empty clause is a contradiction -> formula is unsolvable
+				# look for another literal that is not false to watch instead
+				for k in range(2, len(clause)):
+					candidate = clause[k]
+					candidate_var = candidate >> 1
+					if not (assigned >> candidate_var) & 1 or (value >> candidate_var) & 1 != candidate & 1:
+						clause[1], clause[k] = candidate, false_literal
+						watches[candidate].append(clause_id)
+						break
+				else:
+					# all literals except the other watched literal are false, the clause stays watched by the false literal
+					watchers[n_kept] = clause_id
+					n_kept += 1
+					if other_assigned: # the other watched literal is false as well -> contradiction
+						del watchers[n_kept:position + 1] # the clauses after this one have not been looked at, they stay in the watch list
+						self.bump_activity(clause)
+						return False
+					# unit clause produced -> the variable of the other literal has to be assigned to that polarity
+					self.add_unit(other, iteration + 1, guess)
+					assigned = self.assigned
+					value = self.value
+			
+			del watchers[n_kept:]
+		
+		return True
+	
+	def check_invariants(self):
+		"""
+		Checks the consistency of the solver state, only called during the search if the environment variable SOLVER_DEBUG=1 is set.
+		"""
+		unit_vars = [var(literal) for literal, _, _ in self.units]
+		assert len(set(unit_vars)) == len(unit_vars), "variable assigned twice"
+		assert self.assigned == sum(1 << unit_var for unit_var in unit_vars), "'assigned' does not match the units"
+		assert self.value == sum(1 << var(literal) for literal, _, _ in self.units if sign(literal)), "'value' does not match the units"
+		for clause_id, clause in enumerate(self.clause_lits):
+			assert clause_id in self.watches[clause[0]] and clause_id in self.watches[clause[1]], f"clause {clause_id} is not watched by its first two literals"
+	
+	def bump_activity(self, clause):
+		"""
+		Increases the activity of the variables of a clause that lead to a contradiction, so that 'select_literal' prefers them for the next splits.
+		"""
+		for literal in clause:
+			self.activity[literal >> 1] += self.activity_increment
+		# instead of decaying all activities after each contradiction, the increment is grown - rescale everything before it becomes too large for a float
+		self.activity_increment /= _ACTIVITY_DECAY
+		if self.activity_increment > 1e100:
+			self.activity = [activity * 1e-100 for activity in self.activity]
+			self.activity_increment *= 1e-100
+	
+	def backtrack_to(self, n_units):
+		"""
+		Restores the state at the time the given number of units had been found, by unassigning the variables of all units found afterwards.
+		
+		As the units found before that point had all been propagated (decisions are only made after propagation), the propagation index is reset to the number of units as well.
+		The watched literals do not have to be restored, as unassigning variables cannot make a watched literal false.
+		"""
+		unassigned_bits = 0
+		for literal, _, _ in self.units[n_units:]:
+			unassigned_bits |= 1 << (literal >> 1)
+		self.assigned &= ~unassigned_bits
+		self.value &= ~unassigned_bits
+		del self.units[n_units:]
+		self.idx = n_units
+	
+	def add_clause(self, clause):
+		"""
+		Adds a clause (a list of literals in magnitude-sign representation) to the formula, at the current state of the search.
+		
+		Returns false if all literals of the clause are already false, i.e. the formula has become unsatisfiable, and true otherwise.
+		"""
+		# the watched literals must not be false, so the literals that are not false are moved to the front
+		clause = sorted(clause, key=self.is_false)
+		if not clause or self.is_false(clause[0]):
+			return False
+		if len(clause) == 1 or self.is_false(clause[1]): # all but one literal are false -> unit clause
+			if not (self.assigned >> var(clause[0])) & 1:
+				self.add_unit(clause[0], self.units[-1][1] + 1 if self.units else 0, 0)
+			if len(clause) == 1:
+				return True
+		clause_id = len(self.clause_lits)
+		self.clause_lits.append(clause)
+		self.watches[clause[0]].append(clause_id)
+		self.watches[clause[1]].append(clause_id)
+		return True
+	
+	def is_false(self, literal):
+		"""
+		Returns whether the literal is assigned to be false.
+		"""
+		literal_var = literal >> 1 # var(literal), inlined as 'is_false' is used as a sort key for every literal of a clause in 'add_clause'
+		return bool((self.assigned >> literal_var) & 1) and (self.value >> literal_var) & 1 == literal & 1
+	
+	def solve(self):
+		"""
+		Function to apply DPLL to the formula and solve it.
+		
+		Returns true if the Sudoku has exactly one solution, and false otherwise (no solution/several solutions).
+		"""
+		if not self.search():
+			return False
+		return self.check_uniqueness()
+	
+	def search(self):
+		"""
+		Searches for an assignment of all variables that satisfies the formula, starting from the current state.
+		
+		Returns true if one was found, and false if there is none.
+		
+		Instead of copying the whole state for each DPLL-split, there is a single state: for each split, the number of units is stored in 'self.decision_levels',
+		and if the split leads to a contradiction, the state is restored with 'backtrack_to' and the other polarity is tried.
+		"""
+		while True:
+			if self.propagate():
+				# if we found an assignment to all variables which didn't result in any contradictions (empty clauses, see above), we are done
+				if len(self.units) == self.n_vars:
+					return True
 				
-				for member_literal in new_clause:
-					assert mod_clause in self.clauses[member_literal], f"{self.clauses[member_literal]}"
-					self.clauses[member_literal].remove(mod_clause) # remove the old clause which includes the literal
-					self.clauses[member_literal].add(new_clause) # add the new clause with the literal removed
+				# pure literal elimination may assign further variables, which have to be propagated before splitting
+				if self.pure_literal_elimination and self.eliminate_pure_literals():
+					continue
 				
-			# wipe the clauses of the complementary literal, permanently
-			self.clauses[compl(literal)] = frozenset()
+				# otherwise, choose a variable that isn't assigned yet and first try the positive polarity
+				literal = self.select_literal()
+			else:
+				# contradiction: go back to the latest split where only the positive polarity has been tried (i.e. the literal of the split is positive, its last bit is 0)
+				while self.decision_levels and self.decision_levels[-1][1] & 1:
+					self.decision_levels.pop()
+				# DPLL lead to a negative result - the formula is unsolvable
+				if not self.decision_levels:
+					return False
+				n_units, literal = self.decision_levels.pop()
+				self.backtrack_to(n_units)
+				literal ^= 1 # now try the negative polarity, i.e. complement(literal)
 			
-			idx += 1
-		
-		# pure literal elimination (checking each literal):
-		for lit in range(0, self.n_vars, 2):
-			# skip variables that already have an assignment
-			if self.var_states[var(lit), 0]:
-				continue
-			complement = compl(lit)
-			# check if the positive literal does not occur in clauses
-			if len(self.clauses[lit]) == 0:
-				# if so, assign the variable to the opposite (negative) polarity
-				self.add_unit(complement, iteration, guess)
-			# check if the negated literal does not occur in clauses
-			elif len(self.clauses[complement]) == 0:
-				# if so, assign the variable to the opposite (positive) polarity
-				self.add_unit(lit, iteration, guess)
-		
-		# if we found an assignment to all variables which didn't result in any contradictions (empty clauses, see above), we are done
-		if len(self.units) == 9 ** 3:
-			# if this is the main solver, we check if there are more solutions, otherwise we are done
-			return self.check_uniqueness() if self.is_main_solver else True
-		
-		# otherwise, choose a variable that isn't assigned yet and try check whether the formula is satisfiable for either assignment of the variable
-		literal = self.select_literal()
-		for bit in [0, 1]: # the bit selects the polarity of the literal
-			# create a Solver instance with the additional information about an extra unit clause of the literal
-			sub_solver = Solver(frozenset(), 0, False) # dummy constructor call to get an instance
-			# copy over the variables necessary for solving manually
-			length = np.sum([len(cls) for cls in self.clauses])
-			sub_solver.clauses = [cls.copy() for cls in self.clauses] # here we need to copy 1 layer deep because we have a collection of sets
-			sub_solver.units = self.units.copy() # collection of primitives, shallow copy is fine
-			sub_solver.var_states = self.var_states.copy() # collection of primitives
-			# add the additional unit clause
-			sub_solver.add_unit(literal ^ bit, iteration + 1, guess + 1) # increment the iteration by 100 to store the additional information that this is a guess
-			# check if that instance satisfies the formula
-			if sub_solver.solve(idx):
-				# if it does, copy over the variable assignment and exit the function
-				self.units = sub_solver.units
-				self.var_states = sub_solver.var_states
-				# if this is the main solver, we check if there are more solutions, otherwise we are done
-				return self.check_uniqueness() if self.is_main_solver else True
-		
-		# DPLL lead to a negative result - the formula is unsolvable
-		return False
+			# add the additional unit clause, its iteration is one more than the last unit and its guess is the number of splits
+			iteration = self.units[-1][1] + 1 if self.units else 1
+			self.decision_levels.append((len(self.units), literal))
+			self.add_unit(literal, iteration, len(self.decision_levels))
+	
+	def solve_parallel(self, max_depth=2, processes=None):
+		"""
+		Alternative to 'solve' that splits the search into 2 ** max_depth independent parts which are solved in parallel by worker processes.
+		
+		Each part (a "cube") assigns one combination of polarities to max_depth variables, the workers then continue with the sequential search.
+		The variables are taken from different squares (the 9 variables of a square are consecutive, see 'generate_sudoku_cnf'), one candidate from each of the max_depth squares with the fewest candidates left after the initial propagation.
+		Splitting on two numbers of the same square instead would make one cube contradictory right away and leave most of the search to another one.
+		The activities cannot be used to choose the variables, as there have not been any contradictions yet that would have increased them.
+		As in 'solve', each worker also checks whether its solution is unique within its cube - the Sudoku has exactly one solution if exactly one cube has exactly one solution and all others have none.
+		The workers are stopped as soon as two solutions have been found in total.
+		
+		Returns true if the Sudoku has exactly one solution, and false otherwise (no solution/several solutions).
+		
+		max_depth: the number of variables to split on, there are 2 ** max_depth cubes
+		processes: the number of worker processes, by default one per CPU
+		"""
+		if not self.propagate():
+			return False
+		unassigned_vars = list(self.unassigned_vars())
+		n_candidates = Counter(unassigned_var // 9 for unassigned_var in unassigned_vars) # the number of numbers still possible in each square that is not filled yet
+		cube_squares = sorted(n_candidates, key=n_candidates.__getitem__)[:max_depth]
+		if len(cube_squares) < max_depth: # there are not enough unfilled squares left to split on
+			return self.solve()
+		# the first candidate of each of these squares
+		cube_vars = [next(unassigned_var for unassigned_var in unassigned_vars if unassigned_var // 9 == square) for square in cube_squares]
+		cubes = [[(cube_var * 2) ^ bit for cube_var, bit in zip(cube_vars, bits)] for bits in product((0, 1), repeat=max_depth)]
+		
+		n_solutions, solution_units = 0, None
+		with Pool(processes or os.cpu_count()) as pool: # leaving the with-block terminates the workers that are still running
+			for cube_solutions, units in pool.imap_unordered(_solve_cube, [(self, cube) for cube in cubes]):
+				n_solutions += cube_solutions
+				if cube_solutions:
+					solution_units = units
+				if n_solutions > 1:
+					break
+		
+		self.is_solved = n_solutions == 1
+		if self.is_solved: # take over the solution of the worker
+			self.units = solution_units
+			self.idx = len(self.units)
+			self.assigned = self.all_vars
+			self.value = sum(1 << var(literal) for literal, _, _ in self.units if sign(literal))
+		return self.is_solved
+	
+	def unpack_bits(self, bits):
+		"""
+		Converts a bitmask of the variables (like 'self.assigned' and 'self.value') into a boolean array with one entry per variable.
+		"""
+		n_bytes = (self.n_vars + 7) // 8
+		return np.unpackbits(np.frombuffer(bits.to_bytes(n_bytes, 'little'), dtype=np.uint8), count=self.n_vars, bitorder='little').astype(bool)
+	
+	def eliminate_pure_literals(self):
+		"""
+		Assigns the unassigned variables that only occur in one polarity in the clauses that are not satisfied yet to that polarity.
+		
+		This keeps the formula satisfiable, but in general it can exclude other solutions, which would break the uniqueness check.
+		For the Sudoku CNF it does not: a number that does not occur positively in an unsatisfied clause is excluded by the number already filled in, and a number that does not occur negatively is the only one left for its square.
+		So this only makes propagation find some units earlier, at the cost of going over all clauses - which is why it is optional.
+		
+		Returns true if any variables were assigned.
+		"""
+		true_literals = {literal for literal, _, _ in self.units}
+		occurring = set() # the literals occurring in unsatisfied clauses (the false ones as well, but their variables are assigned anyway)
+		for clause in self.clause_lits:
+			if true_literals.isdisjoint(clause):
+				occurring.update(clause)
+		
+		n_units = len(self.units)
+		iteration, guess = (self.units[-1][1], self.units[-1][2]) if self.units else (0, 0)
+		for unassigned_var in list(self.unassigned_vars()):
+			positive = unassigned_var * 2
+			if positive not in occurring: # also covers variables that do not occur at all
+				self.add_unit(positive ^ 1, iteration, guess)
+			elif positive ^ 1 not in occurring:
+				self.add_unit(positive, iteration, guess)
+		return len(self.units) > n_units
+	
+	def unassigned_vars(self):
+		"""
+		Returns an iterator over the variables that have not been assigned yet, in increasing order.
+		
+		The variables are read off the binary representation of the bitmask of the unassigned variables (reversed, so that the i-th character is the bit of variable i), which is faster than scanning the bits one by one.
+		"""
+		return compress(range(self.n_vars), map('1'.__eq__, bin(self.all_vars ^ self.assigned)[:1:-1]))
 	
 	def select_literal(self):
 		"""
 		Heuristic function to select a variable among those that haven't assigned yet to perform a DPLL-split on.
 		As there are many
 		"""
-		# select all variables that haven't been assigned yet
-		unassigned_vars = list(np.flatnonzero(np.invert(self.var_states[:, 0])))
-		assert len(unassigned_vars) > 0 # if there are no unassigned variables left, then this method should not have been called
-		# apply a heuristic: sort the unassigned variables by number of positive occurrences and return one of those minimizing that metric
-		unassigned_vars.sort(key=lambda v: -(len(self.clauses[v * 2]))) # since we convert from var to (positive) literal, we multiply by 2
-		return unassigned_vars[0] * 2 # we know from the assert above that there has to be at least one
+		assert self.assigned != self.all_vars # if there are no unassigned variables left, then this method should not have been called
+		# apply a heuristic: select the unassigned variable with the highest activity (see 'bump_activity')
+		best_var = max(self.unassigned_vars(), key=self.activity.__getitem__)
+		return best_var * 2 # since we convert from var to (positive) literal, we multiply by 2
 	
 	def check_uniqueness(self):
-		# make a copy of the original clauses (though we could also just use the collection directly)
-		new_clauses = self.original_clauses.copy()
+		"""
+		Checks whether the solution that was found is the only one, by searching again with an extra clause that excludes it.
+		
+		Instead of solving the whole formula again, the solver goes back to the state before the first split (which only contains units implied by the formula),
+		and continues the search from there with the extra clause added. Afterwards, the solution is restored.
+		"""
+		# remember the solution, as the search for a second one changes the state
+		solution = (self.units.copy(), self.assigned, self.value)
+		n_root_units = self.decision_levels[0][0] if self.decision_levels else len(self.units)
+		self.decision_levels.clear()
+		self.backtrack_to(n_root_units)
+		
 		# add a new clause that excludes the solution found
 		# to do this we select all variables that were set to true
-		# make a clause with the polarity of all corresponding literals reversed
-		extra_clause = frozenset(twos_complement((var * 2) ^ 1) for var in np.flatnonzero(self.var_states[:, 1]))
-		new_clauses.add(extra_clause)
-		sub_solver = Solver(new_clauses, self.n_vars, False)
-		original_solution_is_unique = not sub_solver.solve() # if true, then there are additional solutions, which should not be the case.
+		# make a clause with the polarity of all corresponding literals reversed, i.e. the negative literals in magnitude-sign representation, computed for all variables at once
+		extra_clause = ((np.flatnonzero(self.unpack_bits(solution[2])) * 2) ^ 1).tolist()
+		original_solution_is_unique = not (self.add_clause(extra_clause) and self.search()) # if a second solution is found, the original solution is not unique, which should not be the case
+		
+		self.units, self.assigned, self.value = solution
+		self.idx = len(self.units)
 		self.is_solved = original_solution_is_unique
 		return original_solution_is_unique
 	
@@ -189,8 +396,8 @@ class Solver:
 		"""
 		assert self.is_solved 
 		assert len(self.units) == 9 ** 3 # number of unit clauses = number of variables if all went well
-		assert all(self.var_states[:, 0]) # redundant with the assert above unless there are bugs - which you can never be sure of so double checking is better
-		return np.flatnonzero(self.var_states[:, 1]) + 1 # return all variables that are set to true, incremented by 1 as we expect them to be 1-based outside of this class
+		assert self.assigned == self.all_vars # redundant with the assert above unless there are bugs - which you can never be sure of so double checking is better
+		return np.flatnonzero(self.unpack_bits(self.value)) + 1 # return all variables that are set to true, incremented by 1 as we expect them to be 1-based outside of this class
 	
 	
 	def get_steps(self):
@@ -199,10 +406,71 @@ class Solver:
 		"""
 		assert self.is_solved 
 		assert len(self.units) == 9 ** 3 # number of unit clauses = number of variables if all went well
-		assert all(self.var_states[:, 0]) # redundant with the assert above unless there are bugs - which you can never be sure of so double checking is better
+		assert self.assigned == self.all_vars # redundant with the assert above unless there are bugs - which you can never be sure of so double checking is better
 		# the information we are interested in is stored in self.units
 		# we convert the literals back to two's complement, as that is the encoding used outside of this class
 		steps = [(iteration, guess, twos_complement(literal)) for literal, iteration, guess in self.units if literal % 2 == 0]
 		# only return the positive steps (i.e. variables set to true)
 		return steps
 	
+
+
+def _solve_cube(solver_and_cube):
+	"""
+	Worker function for 'Solver.solve_parallel', which solves the formula of the solver with the literals of the cube assigned to be true.
+	
+	Returns the number of solutions within the cube (0, 1, or 2 for more than one) and the units of the solution (None if there is no solution).
+	"""
+	solver, cube = solver_and_cube
+	for literal in cube:
+		if not solver.add_clause([literal]):
+			return 0, None
+	if not solver.search():
+		return 0, None
+	return (1 if solver.check_uniqueness() else 2), solver.units
+
+
+class SolverPySAT:
+	"""
+	Alternative to 'Solver' with the same interface, which delegates the solving to PySAT's Glucose4 solver (a CDCL solver written in C++, which is much faster).
+	
+	It can only be used if PySAT is installed, which is indicated by 'SolverPySAT.is_available'.
+	"""
+	
+	is_available = Glucose4 is not None
+	
+	def __init__(self, clauses: Iterable, n_vars: int):
+		"""
+		Constructor for the solver
+		
+		clauses: a collection of clauses, each clause is a collection of variables which are either in the range [1, n_vars] or in the range [-n_vars, -1]
+		n_vars: the number of variables appearing in the clauses
+		"""
+		assert self.is_available, "PySAT is not installed"
+		self.clauses = [list(clause) for clause in clauses] # the DIMACS-style format expected by PySAT
+		self.n_vars = n_vars
+		self.solution_vars = None
+		self.is_solved = False # whether the formula has been solved, with exactly one solution
+	
+	def solve(self):
+		"""
+		Solves the formula.
+		
+		Returns true if the Sudoku has exactly one solution, and false otherwise (no solution/several solutions).
+		"""
+		with Glucose4(bootstrap_with=self.clauses) as glucose:
+			if not glucose.solve():
+				return False
+			self.solution_vars = [literal for literal in glucose.get_model() if literal > 0]
+			
+			# like in 'Solver.check_uniqueness', a clause excluding the solution is added, which has to make the formula unsatisfiable
+			glucose.add_clause([-var for var in self.solution_vars])
+			self.is_solved = not glucose.solve()
+		return self.is_solved
+	
+	def get_solution(self):
+		"""
+		Returns the solution variables
+		"""
+		assert self.is_solved
+		return np.array(self.solution_vars)
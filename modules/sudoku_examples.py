@@ -13,7 +13,7 @@ sdk_givens = [
        [7, 8, 0, 0, 0, 2, 0, 9, 0],
        [0, 0, 2, 6, 7, 0, 5, 0, 1],
        [0, 0, 0, 3, 1, 5, 2, 0, 9],
-       [0, 0, 0, 0, 0, 0, 0, 0, 0]], dtype=int),
+       [0, 0, 0, 0, 0, 0, 0, 0, 0]], dtype=np.int8),
        np.array([
        [7, 1, 0, 0, 3, 0, 0, 0, 0],
        [0, 0, 0, 0, 0, 0, 8, 0, 1],
@@ -23,7 +23,7 @@ sdk_givens = [
        [4, 0, 6, 3, 0, 0, 9, 0, 0],
        [0, 0, 0, 4, 2, 0, 7, 0, 0],
        [0, 0, 0, 0, 0, 0, 4, 0, 8],
-       [3, 6, 0, 0, 9, 0, 0, 0, 0]], dtype=int),
+       [3, 6, 0, 0, 9, 0, 0, 0, 0]], dtype=np.int8),
        np.array([
        [4, 0, 8, 0, 0, 5, 7, 0, 0],
        [0, 0, 0, 0, 4, 0, 0, 5, 0],
@@ -33,7 +33,7 @@ sdk_givens = [
        [0, 0, 0, 0, 0, 4, 0, 0, 0],
        [0, 0, 0, 0, 9, 0, 0, 0, 5],
        [0, 0, 0, 0, 0, 1, 0, 0, 0],
-       [7, 0, 0, 0, 0, 0, 3, 0, 2]], dtype=int)
+       [7, 0, 0, 0, 0, 0, 3, 0, 2]], dtype=np.int8)
        ]
 
 
@@ -48,7 +48,7 @@ sdk_filled = [
        [7, 8, 5, 1, 3, 2, 6, 9, 4],
        [0, 9, 2, 6, 7, 8, 5, 0, 1],
        [8, 6, 0, 3, 1, 5, 2, 0, 9],
-       [0, 0, 0, 4, 2, 9, 8, 6, 0]], dtype=int),
+       [0, 0, 0, 4, 2, 9, 8, 6, 0]], dtype=np.int8),
        np.array([
        [7, 1, 0, 8, 3, 6, 5, 4, 0],
        [6, 4, 0, 0, 2, 0, 8, 0, 1],
@@ -58,7 +58,7 @@ sdk_filled = [
        [4, 8, 6, 3, 5, 2, 9, 1, 7],
        [0, 0, 0, 4, 2, 8, 7, 0, 0],
        [0, 7, 0, 1, 6, 3, 4, 0, 8],
-       [3, 6, 4, 5, 9, 7, 1, 2, 0]], dtype=int),
+       [3, 6, 4, 5, 9, 7, 1, 2, 0]], dtype=np.int8),
        np.array([
        [4, 6, 8, 2, 1, 5, 7, 9, 3],
        [9, 2, 7, 3, 4, 6, 1, 5, 8],
@@ -68,9 +68,9 @@ sdk_filled = [
        [8, 7, 6, 1, 3, 4, 5, 2, 9],
        [6, 1, 4, 8, 9, 2, 8, 7, 5],
        [3, 8, 2, 5, 7, 1, 9, 4, 6],
-       [7, 5, 9, 4, 6, 0, 3, 1, 2]], dtype=int)
+       [7, 5, 9, 4, 6, 0, 3, 1, 2]], dtype=np.int8)
        ]
 
-
-
-
+# the examples are shared by everything importing this module, so they are made read-only (a copy has to be made to change them)
+for example in sdk_givens + sdk_filled:
+	example.setflags(write=False)
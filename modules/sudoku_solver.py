@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+
+"""
+A Sudoku-specific solver based on constraint propagation over bitmasks, as an alternative to converting the Sudoku into a CNF for the SAT-Solver in 'solver.py'.
+
+The state of the Sudoku is kept in a few small arrays of 9-bit masks, where bit b of a mask means that the number b + 1 is still possible:
+	cell_mask: for each of the 81 squares, the numbers not yet excluded for that square (0 for squares that are already filled)
+	group_mask: for each of the 27 rows/columns/3x3 subgrids, the numbers that are still missing in it
+The candidates of an empty square are then simply the bitwise AND of its own mask and the masks of its row, column and subgrid.
+The propagation is a free function working only on these arrays, so that it is compiled to native code by Numba if that is installed (which makes it several times faster).
+The compiled functions are declared with fixed signatures, so Numba compiles them (or loads them from its cache) when this module is imported, not on the first solve.
+
+Propagation fills in 'naked singles' (squares with only one candidate left) and 'hidden singles' (numbers that fit only into one square of a row/column/subgrid), which is the same information unit propagation derives from the CNF.
+If propagation gets stuck, the solver splits on the candidates of a square with as few candidates as possible, just like the DPLL-split in 'solver.py'.
+Like the SAT-Solver, it does not stop at the first solution but also checks that there is no second one.
+"""
+
+import numpy as np
+
+# Numba is optional - if it is installed, the propagation is compiled to native code, otherwise it runs as plain Python
+# the signatures passed to 'njit' below must match the arrays of 'SudokuSolver' (C-contiguous, uint16 masks and an int8 grid), Numba does not compile other versions of them
+try:
+	from numba import njit
+	_HAS_NUMBA = True
+except ImportError:
+	def njit(*args, **kwargs):
+		return lambda function: function
+	_HAS_NUMBA = False
+
+
+# the 27 groups are numbered rows first (0-8), then columns (9-17), then 3x3 subgrids (18-26), the squares are numbered row by row (i.e. square = y * 9 + x)
+# the squares of each group
+_GROUP_SQUARES = np.array([[n * 9 + i for i in range(9)] for n in range(9)]
+	+ [[i * 9 + n for i in range(9)] for n in range(9)]
+	+ [[((n // 3) * 3 + i // 3) * 9 + (n % 3) * 3 + i % 3 for i in range(9)] for n in range(9)], dtype=np.int64)
+# the row, column and subgrid of each square
+_SQUARE_GROUPS = np.array([[square // 9, 9 + square % 9, 18 + (square // 27) * 3 + (square % 9) // 3] for square in range(9 ** 2)], dtype=np.int64)
+
+# all 9 bits set, i.e. all numbers from 1 to 9 possible
+_ALL = 0x1FF
+
+# the number of set bits in each 9-bit mask, i.e. the number of candidates
+# for a mask with a single bit set, _POPCOUNT[mask - 1] is the index of that bit, i.e. the number minus 1
+_POPCOUNT = np.array([bin(mask).count('1') for mask in range(_ALL + 1)], dtype=np.int64)
+
+# Numba needs the tables as arrays, but plain Python indexes lists of ints much faster than arrays (which create a NumPy scalar for every element)
+if not _HAS_NUMBA:
+	_GROUP_SQUARES = _GROUP_SQUARES.tolist()
+	_SQUARE_GROUPS = _SQUARE_GROUPS.tolist()
+	_POPCOUNT = _POPCOUNT.tolist()
+
+
+@njit('int64(int64, uint16[::1], uint16[::1])', cache=True)
+def _candidates(square, cell_mask, group_mask):
+	"""
+	Returns the mask of numbers that can still be filled into the given square.
+	"""
+	groups = _SQUARE_GROUPS[square]
+	return int(cell_mask[square] & group_mask[groups[0]] & group_mask[groups[1]] & group_mask[groups[2]])
+
+
+@njit('void(int64, int64, int8[::1], uint16[::1], uint16[::1])', cache=True)
+def _place(square, n, grid, cell_mask, group_mask):
+	"""
+	Fills the number n into the given square and removes it from the numbers missing in the square's row, column and subgrid.
+	"""
+	keep = _ALL ^ (1 << (n - 1)) # all bits except the one of n
+	grid[square] = n
+	cell_mask[square] = 0
+	for group in _SQUARE_GROUPS[square]:
+		group_mask[group] &= keep
+
+
+@njit('boolean(int8[::1], uint16[::1], uint16[::1])', cache=True)
+def _propagate(grid, cell_mask, group_mask):
+	"""
+	Fills in naked and hidden singles until neither are left, working only on the arrays of a solver state, so that it can be compiled by Numba.
+	
+	Returns False if a contradiction was found (a square without candidates, or a missing number that fits nowhere in its group), and True otherwise.
+	"""
+	changed = True
+	while changed:
+		changed = False
+		
+		# naked singles: squares with a single candidate left
+		for square in range(9 ** 2):
+			if cell_mask[square] == 0: # the square is already filled
+				continue
+			candidates = _candidates(square, cell_mask, group_mask)
+			if candidates == 0:
+				return False
+			if _POPCOUNT[candidates] == 1:
+				_place(square, _POPCOUNT[candidates - 1] + 1, grid, cell_mask, group_mask)
+				changed = True
+		
+		# hidden singles: numbers that fit into a single square of a group
+		for group in range(27):
+			squares = _GROUP_SQUARES[group]
+			missing = int(group_mask[group])
+			# collect the numbers that are candidates in at least one and in at least two squares of the group
+			once = twice = 0
+			for square in squares:
+				if cell_mask[square]:
+					candidates = _candidates(square, cell_mask, group_mask)
+					twice |= once & candidates
+					once |= candidates
+			if missing & ~once: # a missing number has no square left where it could be filled in
+				return False
+			hidden = missing & ~twice
+			while hidden:
+				bit = hidden & -hidden # the lowest set bit
+				hidden ^= bit
+				# the square has to be looked up again, as placing the previous hidden single may have changed the candidates
+				found = False
+				for square in squares:
+					if cell_mask[square] and _candidates(square, cell_mask, group_mask) & bit:
+						_place(square, _POPCOUNT[bit - 1] + 1, grid, cell_mask, group_mask)
+						found = True
+						break
+				if not found:
+					return False
+				changed = True
+	
+	return True
+
+
+class SudokuSolver:
+
+	def __init__(self, puzzle: np.array):
+		"""
+		Constructor for the solver
+		
+		puzzle: a 9x9 array filled with the numbers from 0 to 9. Zeroes denote unfilled squares.
+		"""
+		self.cell_mask = np.full(9 ** 2, _ALL, dtype=np.uint16)
+		self.group_mask = np.full(27, _ALL, dtype=np.uint16) # the numbers still missing in each row, column and subgrid
+		self.grid = np.zeros(9 ** 2, dtype=np.int8) # the numbers filled into the squares, 0 for empty squares
+		
+		self.solutions = [] # the solutions found so far, the search stops as soon as there is more than one
+		self.is_solved = False # whether the Sudoku has been solved, with exactly one solution
+		self.is_contradictory = False # set if the givens already contradict each other (e.g. the same number twice in a row)
+		
+		for square in np.flatnonzero(puzzle):
+			n = int(puzzle.flat[square])
+			if self.candidates(square) & (1 << (n - 1)):
+				self.place(square, n)
+			else:
+				self.is_contradictory = True
+	
+	def candidates(self, square):
+		"""
+		Returns the mask of numbers that can still be filled into the given square.
+		"""
+		return _candidates(square, self.cell_mask, self.group_mask)
+	
+	def place(self, square, n):
+		"""
+		Fills the number n into the given square and removes it from the numbers missing in the square's row, column and subgrid.
+		"""
+		_place(square, n, self.grid, self.cell_mask, self.group_mask)
+	
+	def propagate(self):
+		"""
+		Fills in naked and hidden singles until neither are left (see '_propagate').
+		
+		Returns False if a contradiction was found, and True otherwise.
+		"""
+		return _propagate(self.grid, self.cell_mask, self.group_mask)
+	
+	def copy(self):
+		"""
+		Returns a copy of the solver state, used for the branches of a split.
+		"""
+		branch = SudokuSolver.__new__(SudokuSolver)
+		branch.cell_mask = self.cell_mask.copy()
+		branch.group_mask = self.group_mask.copy()
+		branch.grid = self.grid.copy()
+		branch.solutions = self.solutions # the solutions are shared by all branches
+		branch.is_solved = False
+		branch.is_contradictory = False
+		return branch
+	
+	def search(self):
+		"""
+		Propagates, and if that does not fill in all squares, splits on the candidates of a square with as few candidates as possible.
+		
+		Every solution found is appended to 'self.solutions', the search stops once two solutions have been found.
+		"""
+		if not self.propagate():
+			return
+		
+		# select the empty square with the fewest candidates
+		best_square, best_count = None, 10
+		for square in np.flatnonzero(self.cell_mask):
+			count = _POPCOUNT[self.candidates(square)]
+			if count < best_count:
+				best_square, best_count = square, count
+		
+		# no empty square left - the Sudoku is solved
+		if best_square is None:
+			self.solutions.append(self.grid.reshape(9, 9).astype(int))
+			return
+		
+		candidates = self.candidates(best_square)
+		while candidates and len(self.solutions) < 2:
+			bit = candidates & -candidates
+			candidates ^= bit
+			branch = self.copy()
+			branch.place(best_square, bit.bit_length())
+			branch.search()
+	
+	def solve(self):
+		"""
+		Solves the Sudoku.
+		
+		Returns true if the Sudoku has exactly one solution, and false otherwise (no solution/several solutions).
+		"""
+		if not self.is_contradictory:
+			self.search()
+		self.is_solved = len(self.solutions) == 1
+		return self.is_solved
+	
+	def get_solution(self):
+		"""
+		Returns the solution as a 9x9 array.
+		"""
+		assert self.is_solved
+		return self.solutions[0]
@@ -4,6 +4,8 @@
 Module containing helper functions used mainly in 'Solver.py'
 """
 
+import numpy as np
+
 def magnitude_sign(lit: int):
 	"""
 	Converts a literal from a twos-complement representation to a magnitude-sign representation.
@@ -23,6 +25,22 @@ def twos_complement(lit: int):
 	magn = lit // 2 + 1 # add back the 1 that was subtracted above
 	return magn * sign
 
+def magnitude_sign_array(lits: np.array):
+	"""
+	Vectorized version of 'magnitude_sign', converts a whole array of literals at once.
+	
+	For single literals the plain function is faster, as indexing into a NumPy array has more overhead than the arithmetic itself.
+	"""
+	lits = np.asarray(lits, dtype=np.int64)
+	return 2 * (np.abs(lits) - 1) + (lits < 0)
+
+def twos_complement_array(lits: np.array):
+	"""
+	Vectorized version of 'twos_complement', the inverse to the 'magnitude_sign_array' function.
+	"""
+	lits = np.asarray(lits, dtype=np.int64)
+	return (lits // 2 + 1) * (1 - 2 * (lits & 1))
+
 def magnitude(lit: int):
 	"""
 	Function to extract the magnitude from a literal in magnitude-sign representation.
@@ -60,6 +78,11 @@ if __name__ == '__main__':
 			assert l == magnitude_sign(twos_complement(l))
 			assert twos_complement(l) not in backward_map, f"{l}, {twos_complement(l)}, {forward_map[twos_complement(l)]}"
 			backward_map[twos_complement(l)] = l
+		
+		# the vectorized versions have to agree with the scalar ones
+		literals = np.array([l for l in range(-9 ** 3, 9 ** 3 + 1) if l != 0])
+		assert magnitude_sign_array(literals).tolist() == [magnitude_sign(l) for l in literals.tolist()]
+		assert twos_complement_array(np.arange(2 * 9 ** 3)).tolist() == [twos_complement(l) for l in range(2 * 9 ** 3)]
 	
 	test_repr_conversion()
 
@@ -4,29 +4,102 @@
 Functions to visualize Sudokus and/or solving progress
 """
 
+import pickle
 import numpy as np
 import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+import matplotlib.colors as mcolors
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.figure import Figure
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import IdentityTransform
 
 from matplotlib.animation import FuncAnimation
 from collections.abc import Iterable
+from functools import lru_cache
+from io import BytesIO
+from threading import Lock
 
 
-def draw_grid():
+# the outlines of the digits, converted from the font only once and shared by all plots (in points, with the baseline starting at the origin like a normal text)
+_DIGIT_PATHS = {n: TextPath((0, 0), str(n), size=25.0) for n in range(1, 10)}
+
+# the size of the figures in inches, the grid takes up the whole figure (see '_setup_grid')
+_FIGSIZE = (7.9, 7.9)
+
+# the background colors of the squares in 'draw_attempt' as RGB values, indexed by the state of the square: 0 = empty (or filled out, if no solution was provided), 1 = 'given', 2 = filled out correctly, 3 = filled out incorrectly
+_SQUARE_COLORS = np.array([mcolors.to_rgb(color) for color in ('white', 'lightgray', 'lightgreen', 'tomato')])
+
+
+def _setup_grid(fig):
 	"""
-	Helper function to draw a normal Sudoku grid.
+	Helper function to draw a normal Sudoku grid into an empty figure, see 'draw_grid' and 'render_attempt'.
+	
+	Returns the axes of the grid.
 	"""
-	fig = plt.figure(figsize=(10, 10), frameon=False)
+	# the axes fill the whole figure, so that there is no empty border that would have to be cropped when saving the figure (e.g. with bbox_inches='tight')
+	fig.subplots_adjust(left=0, bottom=0, right=1, top=1)
+	ax = fig.gca()
 	
-	plt.axis('off')
+	ax.axis('off')
 	
-	# the sudoku grid, consisting of 10 vertical and 10 horizontal lines
-	for c in range(10):
-		plt.plot((c, c), (0, 9), zorder=6, color='black', linewidth=4 if c % 3 == 0 else 1)
-		plt.plot((0, 9), (c, c), zorder=6, color='black', linewidth=4 if c % 3 == 0 else 2)
+	# the sudoku grid, consisting of 10 vertical and 10 horizontal lines, drawn as a single artist
+	segments = [((c, 0), (c, 9)) for c in range(10)] + [((0, c), (9, c)) for c in range(10)]
+	linewidths = [4 if c % 3 == 0 else 1 for c in range(10)] + [4 if c % 3 == 0 else 2 for c in range(10)]
+	ax.add_collection(LineCollection(segments, linewidths=linewidths, colors='black', capstyle='projecting', zorder=6))
 	
+	# a collection does not trigger autoscaling, so the limits are set explicitly (with the default 5% margin, so the thick outer lines are not clipped)
+	ax.set_xlim(-0.45, 9.45)
+	ax.set_ylim(-0.45, 9.45)
+	
+	return ax
+
+def _create_grid():
+	"""
+	Helper function to create a new figure with a normal Sudoku grid, see 'draw_grid'.
+	"""
+	fig = plt.figure(figsize=_FIGSIZE, frameon=False)
+	_setup_grid(fig)
 	return fig
 
+@lru_cache(maxsize=None)
+def _grid_template():
+	"""
+	Returns the figure created by '_create_grid' in pickled form. It is created only once, the figure itself is closed again.
+	"""
+	fig = _create_grid()
+	template = pickle.dumps(fig)
+	plt.close(fig)
+	return template
+
+def draw_grid():
+	"""
+	Helper function to draw a normal Sudoku grid.
+	
+	The grid is the same for every plot, so instead of setting up the figure again, a copy of a pickled template figure is returned (which is several times faster).
+	Like a figure created with 'plt.figure', the copy is managed by pyplot and becomes the current figure.
+	"""
+	return pickle.loads(_grid_template())
+
+def draw_numbers(ax, numbers: np.array):
+	"""
+	Helper function to draw the numbers of a 9x9 numpy array into a Sudoku grid, leaving out zeros.
+	
+	The numbers are drawn from the precomputed digit outlines, with one collection per digit instead of one text artist per square, and the list of collections is returned.
+	A collection that repeats a single outline lets vector formats store that outline only once (an SVG only references it for every further square).
+	"""
+	collections = []
+	for n, path in _DIGIT_PATHS.items():
+		ys, xs = np.nonzero(numbers == n)
+		if len(ys) == 0:
+			continue
+		# the path is given in points, 'sizes' scales it from points to pixels (so the path itself must not be transformed), while the offsets position it in data coordinates
+		collections.append(ax.add_collection(PathCollection([path], sizes=[1.0], offsets=np.column_stack((xs + 0.38, (8 - ys) + 0.3)), offset_transform=ax.transData,
+			transform=IdentityTransform(), facecolors='black', edgecolors='none', zorder=4)))
+	
+	return collections
+
 def draw_sudoku(sudoku: np.array):
 	"""
 	Takes a 9x9 numpy array and visualizes it.
@@ -36,21 +109,51 @@ def draw_sudoku(sudoku: np.array):
 	sudoku: the 9x9 numpy array to be visualized
 	"""
 	assert sudoku.shape == (9, 9)
-	assert 0 <= np.min(sudoku) and np.max(sudoku) <= 9
+	assert 0 <= sudoku.min() and sudoku.max() <= 9
 	
-	draw_grid()
+	fig = draw_grid()
 	
-	# show the numbers
-	for x in range(9):
-		for y in range(9):
-			c = sudoku[y, x]
-			# 0 = empty
-			if c > 0:
-				plt.text(x + 0.38, (8 - y) + 0.3, str(c), zorder=4, size=25.0)
+	# show the numbers (0 = empty)
+	draw_numbers(fig.gca(), sudoku)
 	
 	plt.show()
 
 
+def _draw_attempt(ax, puzzle: np.array, attempted: np.array, solved: np.array):
+	"""
+	Helper function to draw the squares and numbers of 'draw_attempt' into the axes of a Sudoku grid (see 'draw_attempt' for the parameters).
+	
+	Returns the added artists, so that they can be removed again.
+	"""
+	assert puzzle.shape == attempted.shape == (9, 9)
+	assert 0 <= puzzle.min() and puzzle.max() <= 9
+	assert 0 <= attempted.min() and attempted.max() <= 9
+	
+	if solved is not None:
+		assert solved.shape == (9, 9)
+		assert 1 <= solved.min() and solved.max() <= 9
+	
+	# if the square was filled out in the puzzle, then it must not have changed
+	assert np.array_equal(attempted[puzzle > 0], puzzle[puzzle > 0])
+	
+	# square coloring depending on whether a square was a 'given', filled out correctly, incorrectly or not at all
+	# the state of each square (see '_SQUARE_COLORS'), the background is gray if the number was a 'given' and white otherwise
+	square_states = (puzzle > 0).astype(np.int8)
+	if solved is not None:
+		# if solved was provided, correctly/incorrectly filled squares are colored green and red respectively
+		filled = (puzzle == 0) & (attempted != 0)
+		square_states += filled * (2 + (solved != attempted))
+	square_colors = _SQUARE_COLORS[square_states]
+	
+	# color all squares at once, as an image with one pixel per square (row 0 of the array is the top row of the Sudoku, which 'origin' takes care of)
+	squares = ax.imshow(square_colors, extent=(0, 9, 0, 9), origin='upper', interpolation='nearest', aspect='auto', zorder=2)
+	
+	# show the numbers entered by the user, zeros are treated as unfilled squares and skipped
+	numbers = draw_numbers(ax, attempted)
+	
+	return [squares] + numbers
+
+
 def draw_attempt(puzzle: np.array, attempted: np.array, solved: np.array=None, return_fig: bool=False):
 	"""
 	Visualizes the user-filled Sudoku, highlighting mistakes.
@@ -62,40 +165,9 @@ def draw_attempt(puzzle: np.array, attempted: np.array, solved: np.array=None, r
 	attempted: A 9x9 numpy array, the user's attempt at solving the Sudoku puzzle, possibly containing mistakes.
 	solved: Optional, a 9x9 numpy array, the fully solved Sudoku. If this array is not provided, mistakes are not highlighted.
 	"""
-	assert puzzle.shape == attempted.shape == (9, 9)
-	assert 0 <= np.min(puzzle) and np.max(puzzle) <= 9
-	assert 0 <= np.min(attempted) and np.max(attempted) <= 9
-	
-	if solved is not None:
-		assert solved.shape == (9, 9)
-		assert 1 <= np.min(solved) and np.max(solved) <= 9
-	
 	fig = draw_grid()
-	ax = fig.gca()
 	
-	for x in range(9):
-		for y in range(9):
-			n = attempted[y, x]
-			orig_n = puzzle[y, x]
-			assert orig_n == 0 or n == orig_n # if the square was filled out in the puzzle, then it must not have changed
-			
-			# square coloring depending on whether a square was a 'given', filled out correctly, incorrectly or not at all
-			# the default color for the square - used for empty squares and for filled out numbers if no solution was provided
-			square_color = 'white'
-			if orig_n > 0:
-				# color the background of the square gray if the number was a 'given'
-				square_color = 'lightgray'
-			elif solved is not None and n != 0:
-				# if solved was provided, color correctly/incorrectly filled squares green and red respectively
-				square_color = 'lightgreen' if  solved[y, x] == n else'tomato'
-			
-			# color the square
-			ax.add_patch(mpatches.Rectangle((x, 8 - y), 1, 1, fill = True, color = square_color, linewidth = 0, zorder=2))
-			
-			# zeros are treated as unfilled squares and skipped
-			if n != 0:
-				# show the number entered by the user
-				text = plt.text(x + 0.38, 8 - y + 0.3, str(n), zorder=4, size=25.0)
+	_draw_attempt(fig.gca(), puzzle, attempted, solved)
 	
 	if return_fig:
 		return fig
@@ -103,3 +175,27 @@ def draw_attempt(puzzle: np.array, attempted: np.array, solved: np.array=None, r
 		plt.show()
 
 
+def render_attempt(puzzle: np.array, attempted: np.array, solved: np.array=None, format: str='svg'):
+	"""
+	Draws the same figure as 'draw_attempt' and saves it as an image in the given format ('svg', 'png', ...), which is returned as a virtual file (BytesIO).
+	
+	Instead of creating a new figure every time, a single figure that already contains the grid is reused, only the squares and numbers are drawn anew.
+	"""
+	with _LOCK:
+		artists = _draw_attempt(_AXES, puzzle, attempted, solved)
+		try:
+			out_img = BytesIO()
+			_FIGURE.savefig(out_img, format=format)
+		finally:
+			# remove the squares and numbers again, leaving only the grid for the next image
+			for artist in artists:
+				artist.remove()
+	
+	return out_img
+
+
+# the figure reused by 'render_attempt', it is not managed by pyplot and has its own Agg canvas, so that saving it neither depends on the backend configured for pyplot nor keeps any figures alive in pyplot
+_FIGURE = Figure(figsize=_FIGSIZE, frameon=False)
+FigureCanvasAgg(_FIGURE)
+_AXES = _setup_grid(_FIGURE)
+_LOCK = Lock() # the figure must only be drawn into by one thread at a time
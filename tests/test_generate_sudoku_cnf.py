@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+"""
+Tests for the generation of the Sudoku base clauses in 'generate_sudoku_cnf', run with 'python -m pytest' from the repository root.
+"""
+
+import numpy as np
+
+from modules.generate_sudoku_cnf import generate_sudoku_base, generate_sudoku_base_array, clause_array_to_clauses, _load_base_clause_array
+
+def test_base_clauses_are_disjoint():
+	"""
+	Tests that 'generate_sudoku_base' generates every clause exactly once, as it concatenates the clauses of the groups and squares without deduplicating them.
+	
+	There are 81 * 36 at-most-one clauses for the squares, 27 * 9 at-least-one clauses for the groups and 9 * (18 * 36 + 9 * 18) redundant pair clauses for the groups (the subgrids only generate the 18 pairs not already covered by a row or column).
+	"""
+	base_clauses = generate_sudoku_base()
+	
+	assert len(base_clauses) == len(set(base_clauses)), "'generate_sudoku_base' generated duplicate clauses"
+	assert len(base_clauses) == 81 * 36 + 27 * 9 + 9 * (18 * 36 + 9 * 18)
+
+
+def test_base_clause_array():
+	"""
+	Tests that the vectorized 'generate_sudoku_base_array' produces exactly the same clauses as 'generate_sudoku_base'.
+	"""
+	clause_array, lengths = generate_sudoku_base_array()
+	
+	assert clause_array.shape == (len(lengths), 9)
+	assert clause_array_to_clauses(clause_array, lengths) == set(generate_sudoku_base())
+
+
+def test_base_without_redundant_clauses():
+	"""
+	Tests that 'redundant=False' leaves out exactly the pair clauses of the rows/columns/subgrids, in both 'generate_sudoku_base' and 'generate_sudoku_base_array'.
+	"""
+	base_clauses = set(generate_sudoku_base())
+	reduced_clauses = set(generate_sudoku_base(redundant=False))
+	
+	# the pair clauses that are kept are the at-most-one clauses, whose two variables belong to the same square
+	assert reduced_clauses == {clause for clause in base_clauses if len(clause) == 9 or (abs(clause[0]) - 1) // 9 == (abs(clause[1]) - 1) // 9}
+	assert len(reduced_clauses) == 81 * 36 + 27 * 9
+	assert clause_array_to_clauses(*generate_sudoku_base_array(redundant=False)) == reduced_clauses
+
+
+def test_broken_base_cache_file(tmp_path):
+	"""
+	Tests that '_load_base_clause_array' regenerates the base clauses if the cache file is empty or outdated, and replaces it with a valid one.
+	"""
+	expected_array, expected_lengths = generate_sudoku_base_array()
+	cache_path = tmp_path / "base_cnf.npy"
+	
+	for broken_contents in (b"", expected_array[:-1]):
+		if isinstance(broken_contents, bytes):
+			cache_path.write_bytes(broken_contents)
+		else:
+			np.save(cache_path, broken_contents)
+		
+		clause_array, lengths = _load_base_clause_array(cache_path)
+		assert np.array_equal(clause_array, expected_array) and np.array_equal(lengths, expected_lengths)
+		assert np.array_equal(np.load(cache_path), expected_array)
+		assert [path.name for path in tmp_path.iterdir()] == ["base_cnf.npy"] # no temporary file is left behind
@@ -1,14 +1,18 @@
 #!/usr/bin/env python
 
+"""
+Tests for the global identifier functions in 'generate_sudoku_cnf', run with 'python -m pytest' from the repository root.
+"""
+
+from modules.generate_sudoku_cnf import get_global_identifier, split_global_identifier
+
 def test_global_identifier():
 	"""
-	Tests the functions that are imported below for producing valid outputs given valid inputs.
+	Tests the functions that are imported above for producing valid outputs given valid inputs.
 	
 	Each global identifier in the range from 1 to 729 should be generated exactly once.
 	Additionally it tests whether 'get_global_identifier' and 'split_global_identifier' behave as inverse functions given valid inputs.
 	"""
-	from modules.generate_sudoku_cnf import get_global_identifier, split_global_identifier
-	
 	# the sets holding the generated numbers
 	identifier_map = {}
 	
@@ -30,10 +34,3 @@ def test_global_identifier():
 		# tests inversiveness
 		assert identifier == get_global_identifier(*split_global_identifier(identifier)), f"functions 'get_global_identifier' and 'split_global_identifier' did not work as inverses for {identifier}"
 
-
-
-if __name__ == '__main__':
-	print("Running 'test_global_identifier'")
-	test_global_identifier()
-	print("Tests of 'test_global_identifier' successful")
-
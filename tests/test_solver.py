@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+"""
+Tests for the SAT-Solver in 'solver', run with 'python -m pytest' from the repository root.
+"""
+
+import numpy as np
+
+from modules.generate_sudoku_cnf import get_complete_sudoku_clauses, split_global_identifier
+from modules.solver import Solver
+from modules.sudoku_examples import sdk_givens
+from modules.sudoku_solver import SudokuSolver
+
+def test_same_solution_as_sudoku_solver():
+	"""
+	Tests that 'Solver' finds the same solutions as 'SudokuSolver' for the example puzzles (independent of whether PySAT is installed, which 'solve_puzzle' would use instead).
+	"""
+	for puzzle in sdk_givens:
+		puzzle = np.array(puzzle)
+		solver = Solver(get_complete_sudoku_clauses(puzzle), 9 ** 3)
+		assert solver.solve()
+		
+		solution_arr = np.empty((9, 9), dtype=int)
+		for identifier in solver.get_solution():
+			x, y, n = split_global_identifier(identifier)
+			solution_arr[y, x] = n
+		
+		sudoku_solver = SudokuSolver(puzzle)
+		assert sudoku_solver.solve()
+		assert (solution_arr == sudoku_solver.get_solution()).all()
+		
+		# pure literal elimination must not change the result for the Sudoku CNF
+		pure_literal_solver = Solver(get_complete_sudoku_clauses(puzzle), 9 ** 3, pure_literal_elimination=True)
+		assert pure_literal_solver.solve()
+		assert (pure_literal_solver.get_solution() == solver.get_solution()).all()
+
+
+def test_solve_parallel():
+	"""
+	Tests that 'Solver.solve_parallel' finds the same solution as 'Solver.solve', and that it detects puzzles with several solutions.
+	"""
+	clauses = get_complete_sudoku_clauses(np.array(sdk_givens[0]))
+	solver = Solver(clauses, 9 ** 3)
+	assert solver.solve()
+	parallel_solver = Solver(clauses, 9 ** 3)
+	assert parallel_solver.solve_parallel(processes=2)
+	assert (parallel_solver.get_solution() == solver.get_solution()).all()
+	
+	# an empty Sudoku has many solutions
+	assert not Solver(get_complete_sudoku_clauses(np.zeros((9, 9), dtype=int)), 9 ** 3).solve_parallel(processes=2)
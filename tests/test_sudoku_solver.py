@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+
+"""
+Tests for the Sudoku-specific solver in 'sudoku_solver', run with 'python -m pytest' from the repository root.
+"""
+
+import numpy as np
+
+from main import solve_puzzle
+from modules.sudoku_examples import sdk_givens
+from modules.sudoku_solver import SudokuSolver
+
+def test_same_solution_as_sat_solver():
+	"""
+	Tests that 'SudokuSolver' finds the same solution as the SAT-Solver for the example puzzles, and that it detects puzzles with several solutions.
+	"""
+	for puzzle in sdk_givens:
+		puzzle = np.array(puzzle)
+		assert (solve_puzzle(puzzle) == solve_puzzle(puzzle, use_sat_solver=True)).all()
+	
+	# an empty Sudoku has many solutions
+	assert not SudokuSolver(np.zeros((9, 9), dtype=int)).solve()
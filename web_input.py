@@ -1,17 +1,20 @@
 #!/usr/bin/env python
 
-from dash import Dash, html, dcc, Input, Output, State
+from dash import Dash, html, dcc, Input, Output, State, MATCH
 import plotly.express as px
 import pandas as pd
 import numpy as np
 
 import os
+import sys
 import json
 import base64
-from io import BytesIO
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from threading import Lock
 
-from main import solve_puzzle
-from modules.visualisation import draw_attempt
+from main import solve_puzzle, solve_and_render
 from modules.sudoku_examples import sdk_givens, sdk_filled
 
 # read some environment variables from a json file
@@ -26,86 +29,98 @@ with open(os.path.join(os.path.dirname(__file__), ".env.json"), "r") as jsonfile
 
 app = Dash(__name__)
 
+# the worker processes that solve and draw the Sudokus (see 'solve_and_render' in 'main.py'), one per CPU core - the pool is only created when it is needed (see '_get_executor')
+# on Linux they are forked, so that they inherit everything already imported here (including the Numba kernels of the solver, which are compiled or loaded from Numba's cache when it is imported, see 'modules/sudoku_solver.py')
+# elsewhere forking is unsafe (macOS) or not possible (Windows), so they are spawned: the workers then import 'main.py' to run 'solve_and_render', and if this file is run as a script, they also re-run its module-level code (as '__mp_main__'), which is only slower to start
+_MP_CONTEXT = multiprocessing.get_context('fork' if sys.platform.startswith('linux') else 'spawn')
+_EXECUTOR = None
+_EXECUTOR_LOCK = Lock() # the requests are handled by several threads, only one of them may create the pool
 
-# if 'TEST_SUDOKU' then load the test-Sudoku here
+def _get_executor():
+	"""
+	Returns the pool of worker processes, creating it on the first call.
+	
+	With forked workers, an example is solved right after creating the pool, which starts all workers at once (a forking pool starts all its workers with the first task), so that the first 'Check Solution' click does not have to wait for that.
+	When this file is run as a script, this is done before the web server is started (see below), so that the workers are forked while this process does not run the threads of the web server yet (forking a process with several threads is unsafe).
+	"""
+	global _EXECUTOR
+	with _EXECUTOR_LOCK:
+		if _EXECUTOR is None:
+			_EXECUTOR = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=_MP_CONTEXT)
+			if _MP_CONTEXT.get_start_method() == 'fork':
+				_EXECUTOR.submit(solve_puzzle, sdk_givens[0]).result()
+	
+	return _EXECUTOR
+
+
+# the keyword arguments shared by all text input fields of the Sudoku grids
+_INPUT_KWARGS = dict(
+	type='text',
+	minLength='0',
+	maxLength='1',
+	pattern='[1-9]?' # this pattern allows the empty sequence (='') or up to 1 digit from 1 to 9
+)
+
+def _table_rows(grid_type: str, values: list):
+	"""
+	Creates the rows of one of the Sudoku grids (as html table elements, each row is a <tr> with 9 <td> table cells).
+	
+	Each cell contains a text input field to enter a number (an <input> html element), with a pattern-matching id, so that a single callback can handle all inputs (see below).
+	
+	grid_type: the type in the ids of the inputs, 'givens' or 'entered'
+	values: the initial values of the inputs, 9 rows of 9 strings
+	"""
+	return [html.Tr([html.Td(dcc.Input(id={'type': grid_type, 'index': y * 9 + x}, value=values[y][x], **_INPUT_KWARGS)) for x in range(9)]) for y in range(9)]
+
+# if 'TEST_SUDOKU' then fill the input elements with the values from the test-Sudoku, otherwise they are initially empty
 if TEST_SUDOKU:
 	test_givens = sdk_givens[2]
 	test_entered = sdk_filled[2]
+	assert np.array_equal(test_givens[test_givens != 0], test_entered[test_givens != 0])
+	givens_values = [[str(n) if n != 0 else '' for n in row] for row in test_givens]
+	entered_values = [[str(n) if n != 0 else '' for n in row] for row in test_entered]
+else:
+	givens_values = entered_values = [[''] * 9] * 9
 
-# the rows of the Sudoku (as html table elements, each row is a <tr>)
-givens_table_rows = [] # the givens (numbers already filled out at the beginning)
-entered_table_rows = [] # the numbers filled in by the person solving the Sudoku
-for y in range(9):
-	g_row_elements = [] # a single 'givens' row, with 9 <td> table cells
-	e_row_elements = []
-	for x in range(9):
-		# a text input field to enter a number, an <input> html element
-		givens_input = dcc.Input(
-			id='givens_' + str(y * 9 + x),
-			value='', # initially empty
-			type='text',
-			minLength='0',
-			maxLength='1',
-			pattern='[1-9]?' # this pattern allows the empty sequence (='') or up to 1 digit from 1 to 9
-		)
-		entered_input = dcc.Input(
-			id='entered_' + str(y * 9 + x),
-			value='',
-			type='text',
-			minLength='0',
-			maxLength='1',
-			pattern='[1-9]?'
-		)
-		
-		# if 'TEST_SUDOKU' then fill the input elements with the values from the loaded Sudoku
-		if TEST_SUDOKU:
-			if test_givens[y,x] != 0:
-				assert test_givens[y, x] == test_entered[y, x]
-				givens_input.value = str(test_givens[y, x])
-			if test_entered[y,x] != 0:
-				entered_input.value = str(test_entered[y, x])
-		
-		# populate the rows with <td>s containing the <input>s
-		g_row_elements.append(html.Td(givens_input))
-		e_row_elements.append(html.Td(entered_input))
-		
-		# a callback for when a field in the 'givens' Sudoku grid is changed
-		# when this happens, the change is carried over to the 'entered' Sudoku grid
-		@app.callback(
-			Output(entered_input, component_property='value'), # the first return parameter: a value of an input in the 'entered' Sudoku grid
-			Output(entered_input, component_property='style'), # second return parameter: a style (a disabled input is greyed out)
-			Output(entered_input, component_property='disabled'), # third parameter: boolean to disable the input
-			Input(givens_input, component_property='value'), # input parameter, the corresponding value of the 'givens' Sudoku grid
-			State(entered_input, component_property='value'), # another input parameter, the value of the input in the 'entered' Sudoku grid
-			State(entered_input, component_property='disabled'), # third parameter, whethere that input is disabled
-		)
-		def update_output_div(givens_value, entered_value, entered_disabled):
-			# basic sanity checks
-			assert givens_value is not None # as the value is initialized with '', None should not be possible as an value
-			assert entered_value is not None # dito
-			assert 0 <= len(givens_value) <= 1 # the input-regex should only allow the empty string or digits from 1 to 9
-			
-			# if there is a number from 1 to 9 entered in a 'givens' input
-			if len(givens_value) == 1:
-				assert '1' <= givens_value <= '9' # only numbers from 1 to 9 should pass the regex check of the input (see above)
-				# then this input is carried over to the corresponding 'entered' input, and the latter is disabled and colored in gray
-				return givens_value, {'backgroundColor':'#ccc'}, True
-			# else, if the 'givens' input was blanked out and the 'entered' input had been bound to the same value earlier (and thus disabled)
-			elif len(givens_value) == 0 and entered_disabled:
-				# then empty the 'entered' input field to and enable it
-				return '', {}, False
-			# the last case only happens at the beginning if 'TEST_SUDOKU' is True, because 'update_output_div' is once called for each input after initialization
-			# when this happens, the 'givens_value' is blank and also the 'entered' input is enabled
-			elif len(givens_value) == 0 and not entered_disabled:
-				# in this case the 'entered_value' should be left unchanged
-				return entered_value, {}, False
-			else:
-				# the 3 ifs above should be exhaustive, if we end up here something went wrong
-				assert False, f"{givens_value}, {entered_value}, {entered_disabled}"
-		
-	# create the html <tr> elements
-	givens_table_rows.append(html.Tr(g_row_elements))
-	entered_table_rows.append(html.Tr(e_row_elements))
+# the rows of the Sudoku
+givens_table_rows = _table_rows('givens', givens_values) # the givens (numbers already filled out at the beginning)
+entered_table_rows = _table_rows('entered', entered_values) # the numbers filled in by the person solving the Sudoku
+
+# a callback for when a field in the 'givens' Sudoku grid is changed
+# when this happens, the change is carried over to the corresponding field ('MATCH' = the same index) of the 'entered' Sudoku grid
+# this runs as JavaScript in the browser, so that typing in a Sudoku does not send a request to the server for every single field
+app.clientside_callback(
+	"""
+	function(givensValue, enteredValue, enteredDisabled) {
+		// basic sanity checks, the input-regex should only allow the empty string or digits from 1 to 9
+		if (givensValue == null || enteredValue == null || givensValue.length > 1) {
+			throw new Error(`${givensValue}, ${enteredValue}, ${enteredDisabled}`);
+		}
+		// if there is a number from 1 to 9 entered in a 'givens' input
+		if (givensValue.length === 1) {
+			if (givensValue < '1' || givensValue > '9') {
+				throw new Error(`${givensValue}, ${enteredValue}, ${enteredDisabled}`);
+			}
+			// then this input is carried over to the corresponding 'entered' input, and the latter is disabled and colored in gray
+			return [givensValue, {'backgroundColor': '#ccc'}, true];
+		}
+		// else, if the 'givens' input was blanked out and the 'entered' input had been bound to the same value earlier (and thus disabled)
+		if (enteredDisabled) {
+			// then empty the 'entered' input field to and enable it
+			return ['', {}, false];
+		}
+		// the last case only happens at the beginning if 'TEST_SUDOKU' is True, because the callback is once called for each input after initialization
+		// when this happens, the 'givensValue' is blank and also the 'entered' input is enabled, so the 'enteredValue' should be left unchanged
+		return [enteredValue, {}, false];
+	}
+	""",
+	Output({'type': 'entered', 'index': MATCH}, component_property='value'), # the first return parameter: a value of an input in the 'entered' Sudoku grid
+	Output({'type': 'entered', 'index': MATCH}, component_property='style'), # second return parameter: a style (a disabled input is greyed out)
+	Output({'type': 'entered', 'index': MATCH}, component_property='disabled'), # third parameter: boolean to disable the input
+	Input({'type': 'givens', 'index': MATCH}, component_property='value'), # input parameter, the corresponding value of the 'givens' Sudoku grid
+	State({'type': 'entered', 'index': MATCH}, component_property='value'), # another input parameter, the value of the input in the 'entered' Sudoku grid
+	State({'type': 'entered', 'index': MATCH}, component_property='disabled'), # third parameter, whethere that input is disabled
+)
 
 # the html structure of the web page
 # the corresponding css file is found at assets/table.css
@@ -126,14 +141,33 @@ app.layout = html.Div(children=[
 	
 ], className='baseDiv')
 
+@lru_cache(maxsize=128)
+def _cached_solve_and_draw(givens_bytes: bytes, entered_bytes: bytes):
+	"""
+	Solves the Sudoku given by the givens and draws the entered numbers with the correct/incorrect entries being colored green and red respectively, for the givens/entered arrays given as the bytes of 9x9 int8 arrays (so that they can be used as the key of the cache).
+	
+	Returns the drawing as a base 64 encoded svg image, or None if the Sudoku does not have exactly one solution.
+	Solving and drawing is done by 'solve_and_render' in one of the worker processes (see '_get_executor'), as both only use the CPU and would otherwise block the other requests (Python threads cannot run in parallel).
+	The results of the last 128 Sudokus are cached, so that submitting the same Sudoku again (e.g. clicking 'Check Solution' twice) neither solves nor draws it again.
+	"""
+	givens_arr = np.frombuffer(givens_bytes, dtype=np.int8).reshape(9, 9)
+	entered_arr = np.frombuffer(entered_bytes, dtype=np.int8).reshape(9, 9)
+	# the figure is saved as svg, which is faster to produce than a png (nothing has to be rasterized) and also less than half its size
+	image = _get_executor().submit(solve_and_render, givens_arr, entered_arr, 'svg').result()
+	if image is None:
+		return None
+	
+	# encode the image in base 64 ('b64encode' does not insert any newlines)
+	return base64.b64encode(image).decode("ascii")
+
 # callback for when the 'Check Solution' button is pressed
 @app.callback(
 	Output('error_msg_div', 'children'), # div output (text)
 	Output('error_msg_div', 'style'), # style (used to hide the div or color its background)
 	Output('visualisation_output', 'src'), # an image to be shown
 	Input('submit-val', 'n_clicks'), # the number the button has been clicked (mostly irrelevant, but this input leads to the function being called)
-	*[State('givens_' + str(i), 'value')  for i in range(81)], # the input values of the 'givens' grid
-	*[State('entered_' + str(i), 'value')  for i in range(81)] # the input values of the 'entered' grid
+	*[State({'type': 'givens', 'index': i}, 'value')  for i in range(81)], # the input values of the 'givens' grid
+	*[State({'type': 'entered', 'index': i}, 'value')  for i in range(81)] # the input values of the 'entered' grid
 )
 def update_output(n_clicks, *values):
 	assert len(values) == 81 * 2 # basic sanity check, there should be 9x9x2 values
@@ -143,50 +177,30 @@ def update_output(n_clicks, *values):
 		# neither an error message nor a figure to display
 		return '', {'display': 'none'}, ''
 	
-	# separate given and entered values
-	givens = values[:81]
-	entered = values[81:]
-	# convert them into numpy arrays
-	givens_arr = np.zeros((9,9), dtype=int)
-	entered_arr = np.zeros((9,9), dtype=int)
-	for i in range(81):
-		y = i // 9
-		x = i % 9
-		g = givens[i]
-		e = entered[i]
-		if len(g) == 1 and '1' <= g <= '9':
-			assert g == e
-			givens_arr[y, x] = int(g)
-		if len(e) == 1 and '1' <= e <= '9':
-			entered_arr[y, x] = int(e)
+	# convert all values into numpy arrays at once: as strings of (at most) 2 characters, viewed as the unicode code points of these characters (0 for missing characters)
+	codes = np.array(values, dtype='<U2').view(np.uint32).reshape(2, 9, 9, 2)
+	digits = codes[..., 0].astype(int) - ord('0')
+	# only single digits from 1 to 9 are numbers, everything else (in particular the empty string) is an empty square
+	is_number = (codes[..., 1] == 0) & (1 <= digits) & (digits <= 9)
+	# separate given and entered values, as the numbers are only 0 to 9 they are stored as int8 (which also makes the arrays cheaper to send to the worker processes)
+	givens_arr, entered_arr = np.where(is_number, digits, 0).astype(np.int8)
+	assert np.array_equal(givens_arr[is_number[0]], entered_arr[is_number[0]]) # the givens are carried over to the 'entered' grid (see the clientside callback above)
 	
-	try:
-		# try solving the Sudoku puzzle presented by the 'givens'
-		solution_arr = solve_puzzle(givens_arr) 
-	except AssertionError:
-		# assertion error if there isn't exactly one solution
+	# solving and drawing is done by one of the worker processes (see '_cached_solve_and_draw'), so that several requests can be handled in parallel, unless the same Sudoku was submitted before
+	encoded = _cached_solve_and_draw(givens_arr.tobytes(), entered_arr.tobytes())
+	if encoded is None:
 		return 'Error: Sudoku puzzle has either more than one or zero solutions.', {'backgroundColor':'#fd7070'}, ''
 	
-	# otherwise the givens/entered arrays are drawn, with the correct/incorrect entries of the entered array being colored green and red respectively
-	fig = draw_attempt(givens_arr, entered_arr, solution_arr, return_fig=True)
-	
-	# save the figure as a virtual file
-	out_img = BytesIO()
-	fig.savefig(out_img, format='png', bbox_inches='tight')
-	
-	fig.clf()
-	
-	
-	# encode that file in base 64
-	out_img.seek(0)
-	encoded = base64.b64encode(out_img.read()).decode("ascii").replace("\n", "")
-	
 	# present it to the user
-	return 'Correct and incorrect squares are colored green and red respectively:', {}, f"data:image/png;base64,{encoded}"
+	return 'Correct and incorrect squares are colored green and red respectively:', {}, f"data:image/svg+xml;base64,{encoded}"
 	
 
 
 if __name__ == '__main__':
+	# start the worker processes before the web server (see '_get_executor')
+	# in debug mode, Werkzeug's reloader runs this file again in a child process which runs the server (and has 'WERKZEUG_RUN_MAIN' set), while this process only restarts it when the code changes and does not need any workers
+	if not APP_DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+		_get_executor()
 	app.run_server(host=APP_HOST, port=APP_PORT, debug=APP_DEBUG, dev_tools_props_check=DEV_TOOLS_PROPS_CHECK)
 
 